@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+"""
+Description: Stand-in for nmap used to check scan_compare.py without scanning anything.
+             It reads the hosts of an input list file (-iL) and writes Nmap-style XML
+             to stdout (-oX -), listing the hosts in reverse order so results can only
+             be matched back by address. A host is up if its address as an integer is
+             divisible by 3, or always with -Pn. Like Nmap, IPv6 hosts are only
+             reported with -6 and IPv4 hosts only without it.
+
+Usage: fake_nmap.py [scan option] -iL hosts.txt -oX - [-6] [other flags...]
+
+    FAKE_NMAP_LOG: If set, every invocation appends one line to this file:
+                   "<ipv4|ipv6> <host> <host>...".
+"""
+
+import ipaddress
+import os
+import sys
+
+
+def is_up(host: str, no_ping: bool=False) -> bool:
+    """
+    The state the fake reports for a host.
+
+    Parameters:
+        host (str): IP address.
+        no_ping (bool, optional): -Pn was given, so every host is up.
+
+    Returns:
+        bool: True if the host is reported up.
+    """
+    return no_ping or int(ipaddress.ip_address(host)) % 3 == 0
+
+def main(args: list) -> int:
+    if "-iL" not in args:
+        print("fake_nmap.py: -iL is required", file=sys.stderr)
+        return 1
+    with open(args[args.index("-iL") + 1], encoding="utf-8") as host_file:
+        hosts = [line.strip() for line in host_file if line.strip()]
+    version = 6 if "-6" in args else 4
+
+    log_file = os.environ.get("FAKE_NMAP_LOG")
+    if log_file:
+        with open(log_file, "a", encoding="utf-8") as log:
+            log.write(" ".join([f"ipv{version}"] + hosts) + "\n")
+
+    print('<?xml version="1.0"?>')
+    print('<nmaprun scanner="fake_nmap">')
+    for host in reversed(hosts):
+        if ipaddress.ip_address(host).version != version:
+            continue
+        state = "up" if is_up(host, "-Pn" in args) else "down"
+        print(f'<host><status state="{state}"/>'
+              f'<address addr="{host}" addrtype="ipv{version}"/></host>')
+    print('</nmaprun>')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
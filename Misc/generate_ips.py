@@ -1,15 +1,44 @@
 """
 Generate a file with IP addresses.
 
+Targets are CIDR blocks ("10.0.0.0/16"), dash ranges ("10.0.0.1-10.0.0.50" or
+"10.0.0.1-50") or single addresses. Without targets the octet ranges in IP_RANGES
+are used.
+
     Args:
         --output-file: The filename to be used for output. 
+        --target: CIDRs, dash ranges or addresses to generate.
+        --target-file: File with one target per line.
+        --exclude: CIDRs, dash ranges or addresses to leave out.
+        --exclude-file: File with one exclusion per line.
+        --skip-reserved: Leave out reserved blocks (0/8, 127/8, 224/4, 240/4).
+        --shards: Split the output into N balanced files (gen-output-1.txt, ...).
+        --random: Write addresses in a pseudo-random order.
+        --seed: Seed for --random; the same seed gives the same order.
+        --binary: Write the packed binary format instead of text (gen-output.bin).
+        --layout: Binary records: "addresses", "intervals" or "auto" (smaller file).
+        --export-text: Convert a binary file to text in --output-file.
+
+Binary format (little-endian): a 24-byte header (magic b"GIPS", version, layout,
+reserved, record count, address count) followed by sorted uint32 addresses or
+sorted (start, length) uint32 interval pairs. BinaryTargetList memory-maps it.
 
 """
 
 import argparse
+import array
+import bisect
+import ipaddress
 import itertools
+import mmap
+import os
+import random
+import struct
 import sys
 
+# Characters of generated text collected before each write
+BUFFER_SIZE = 1 << 20
+
 IP_RANGES = {
     "first_octet_range": (192, 192, 1),
     "second_octet_range": (168, 168, 1),
@@ -17,6 +46,69 @@
     "fourth_octet_range": (1, 1, 1)
 }
 
+# Blocks skipped by --skip-reserved: "this" network, loopback, multicast and reserved
+RESERVED_BLOCKS = ("0.0.0.0/8", "127.0.0.0/8", "224.0.0.0/4", "240.0.0.0/4")
+
+# Addresses collected per shard before a write in --random mode
+LINE_BUFFER_SIZE = 1 << 16
+
+# Binary target list header: magic, version, layout, reserved, record count, address count
+BINARY_MAGIC = b"GIPS"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<4sBBHQQ")
+LAYOUT_ADDRESSES = 0
+LAYOUT_INTERVALS = 1
+LAYOUTS = {"addresses": LAYOUT_ADDRESSES, "intervals": LAYOUT_INTERVALS}
+
+# Addresses converted to uint32 per write in the binary writer
+ARRAY_CHUNK_SIZE = 1 << 20
+
+# "d\n" for every fourth octet value, sliced per /24 block
+FOURTH_OCTET_TAILS = [f"{fourth}\n" for fourth in range(256)]
+
+
+def octet_values(octet_range):
+    """
+    Expand an octet range tuple into the values it covers.
+
+    Args:
+        octet_range (tuple): (start, end, step) for one octet, end inclusive.
+
+    Returns:
+        range: The octet values.
+    """
+    return range(octet_range[0], octet_range[1] + 1, octet_range[2])
+
+
+def iter_ip_blocks(first_octet_range, second_octet_range, third_octet_range, fourth_octet_range):
+    """
+    Generate IP addresses as large newline-separated text blocks.
+
+    The "third.fourth" suffixes are formatted once; every first/second octet prefix
+    then produces one block with a single str.join, instead of formatting and
+    writing each address separately. Addresses come out in the same order as
+    itertools.product over the four ranges.
+
+    Args:
+        first_octet_range (tuple): Range for the first octet of the IP address.
+        second_octet_range (tuple): Range for the second octet of the IP address.
+        third_octet_range (tuple): Range for the third octet of the IP address.
+        fourth_octet_range (tuple): Range for the fourth octet of the IP address.
+
+    Yields:
+        tuple: (text block, number of addresses in the block).
+    """
+    tails = [f"{third}.{fourth}\n"
+             for third in octet_values(third_octet_range)
+             for fourth in octet_values(fourth_octet_range)]
+    if not tails:
+        return
+
+    for first in octet_values(first_octet_range):
+        for second in octet_values(second_octet_range):
+            prefix = f"{first}.{second}."
+            yield prefix + prefix.join(tails), len(tails)
+
 
 def generate_ips(first_octet_range, second_octet_range, third_octet_range, fourth_octet_range,
                  output_file):
@@ -30,20 +122,833 @@ def generate_ips(first_octet_range, second_octet_range, third_octet_range, fourt
         fourth_octet_range (tuple): Range for the fourth octet of the IP address.
         output_file (str): Name and path of output file.
     """
+    count = write_blocks(iter_ip_blocks(first_octet_range, second_octet_range,
+                                        third_octet_range, fourth_octet_range), output_file)
+    print(f"Printed {count} IPs to file {output_file}!")
+
+
+def parse_target(target):
+    """
+    Parse a CIDR block, dash range or single address into an integer interval.
+
+    Dash ranges may give a full end address or replace only the trailing octets of
+    the start address, so "10.0.0.1-50" ends at 10.0.0.50.
+
+    Args:
+        target (str): IPv4 CIDR block, dash range or address.
+
+    Returns:
+        tuple: (start, end) as inclusive integers.
+
+    Raises:
+        ValueError: If the target is not a valid IPv4 CIDR block, range or address.
+    """
+    target = target.strip()
+    try:
+        if "/" in target:
+            network = ipaddress.IPv4Network(target, strict=False)
+            return int(network.network_address), int(network.broadcast_address)
+        if "-" in target:
+            start, end = target.split("-", 1)
+            start_octets = start.strip().split(".")
+            end_octets = end.strip().split(".")
+            if not 1 <= len(end_octets) <= 4:
+                raise ValueError
+            start_number = int(ipaddress.IPv4Address(start.strip()))
+            end_number = int(ipaddress.IPv4Address(".".join(start_octets[:4 - len(end_octets)] + end_octets)))
+            if end_number < start_number:
+                raise ValueError
+            return start_number, end_number
+        number = int(ipaddress.IPv4Address(target))
+        return number, number
+    except ValueError:
+        raise ValueError(f"Invalid target: {target!r}") from None
+
+
+def merge_intervals(intervals):
+    """
+    Sort intervals and merge the ones that overlap or touch.
+
+    Args:
+        intervals (iterable): (start, end) integer pairs, end inclusive.
+
+    Returns:
+        list: Sorted, disjoint (start, end) pairs.
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_intervals(intervals, exclusions):
+    """
+    Remove exclusions from a set of intervals.
+
+    Both inputs are merged first and then walked once side by side, so the cost
+    depends on the number of intervals, not on the number of addresses.
+
+    Args:
+        intervals (iterable): (start, end) pairs to keep.
+        exclusions (iterable): (start, end) pairs to remove.
+
+    Returns:
+        list: Sorted, disjoint (start, end) pairs.
+    """
+    exclusions = merge_intervals(exclusions)
+    result = []
+    index = 0
+    for start, end in merge_intervals(intervals):
+        while index < len(exclusions) and exclusions[index][1] < start:
+            index += 1
+        position = index
+        while start <= end and position < len(exclusions) and exclusions[position][0] <= end:
+            excluded_start, excluded_end = exclusions[position]
+            if excluded_start > start:
+                result.append((start, excluded_start - 1))
+            start = max(start, excluded_end + 1)
+            position += 1
+        if start <= end:
+            result.append((start, end))
+    return result
+
+
+def build_intervals(targets, exclusions=(), skip_reserved=False):
+    """
+    Turn target and exclusion strings into the intervals to generate.
+
+    Args:
+        targets (iterable): CIDR blocks, dash ranges or addresses.
+        exclusions (iterable): CIDR blocks, dash ranges or addresses to leave out.
+        skip_reserved (bool): Also leave out RESERVED_BLOCKS.
+
+    Returns:
+        list: Sorted, disjoint (start, end) pairs.
+
+    Raises:
+        ValueError: If a target or exclusion cannot be parsed.
+    """
+    excluded = [parse_target(exclusion) for exclusion in exclusions]
+    if skip_reserved:
+        excluded.extend(parse_target(block) for block in RESERVED_BLOCKS)
+    return subtract_intervals((parse_target(target) for target in targets), excluded)
+
+
+def read_target_file(file_name):
+    """
+    Read targets from a file, one per line, skipping blank lines and # comments.
+
+    Args:
+        file_name (str): Path to the file.
+
+    Returns:
+        list: Target strings.
+    """
+    with open(file_name, encoding="utf-8") as target_file:
+        return [line.split("#", 1)[0].strip() for line in target_file
+                if line.split("#", 1)[0].strip()]
+
+
+def count_addresses(intervals):
+    """
+    Count the addresses covered by a set of disjoint intervals.
+
+    Args:
+        intervals (iterable): Disjoint (start, end) pairs.
+
+    Returns:
+        int: Number of addresses.
+    """
+    return sum(end - start + 1 for start, end in intervals)
+
+
+def int_to_ip(number):
+    """
+    Format an integer as a dotted-quad IPv4 address.
+
+    Args:
+        number (int): Address as an integer.
+
+    Returns:
+        str: Dotted-quad address.
+    """
+    return f"{number >> 24}.{(number >> 16) & 255}.{(number >> 8) & 255}.{number & 255}"
+
+
+def iter_ips(intervals):
+    """
+    Lazily generate the addresses covered by a set of intervals.
+
+    Args:
+        intervals (iterable): Sorted, disjoint (start, end) pairs.
+
+    Yields:
+        str: Dotted-quad addresses in ascending order.
+    """
+    for start, end in intervals:
+        for number in range(start, end + 1):
+            yield int_to_ip(number)
+
+
+def iter_interval_blocks(intervals):
+    """
+    Lazily generate the addresses covered by a set of intervals as text blocks.
+
+    Each block holds the part of an interval inside one /24, built with a single
+    str.join over the precomputed fourth octet suffixes.
+
+    Args:
+        intervals (iterable): Sorted, disjoint (start, end) pairs.
+
+    Yields:
+        tuple: (text block, number of addresses in the block).
+    """
+    for start, end in intervals:
+        while start <= end:
+            block_end = min(end, start | 255)
+            prefix = f"{start >> 24}.{(start >> 16) & 255}.{(start >> 8) & 255}."
+            tails = FOURTH_OCTET_TAILS[start & 255:(block_end & 255) + 1]
+            yield prefix + prefix.join(tails), len(tails)
+            start = block_end + 1
+
+
+def write_blocks(blocks, output_file):
+    """
+    Append text blocks to a file, writing about BUFFER_SIZE characters at a time.
+
+    Args:
+        blocks (iterable): (text block, number of addresses) pairs.
+        output_file (str): Name and path of output file.
+
+    Returns:
+        int: Number of addresses written.
+    """
     count = 0
+    buffer = []
+    buffered = 0
     with open(output_file, "a", encoding="utf-8") as output:
-        for ip_addr in itertools.product(
-                range(first_octet_range[0], first_octet_range[1] + 1, first_octet_range[2]),
-                range(second_octet_range[0], second_octet_range[1] + 1, second_octet_range[2]),
-                range(third_octet_range[0], third_octet_range[1] + 1, third_octet_range[2]),
-                range(fourth_octet_range[0], fourth_octet_range[1] + 1, fourth_octet_range[2])):
-            ip_curr = ".".join(map(str, ip_addr))
-            output.write(ip_curr + "\n")
-            count += 1
+        for block, block_count in blocks:
+            buffer.append(block)
+            buffered += len(block)
+            count += block_count
+            if buffered >= BUFFER_SIZE:
+                output.write("".join(buffer))
+                buffer = []
+                buffered = 0
+        output.write("".join(buffer))
+    return count
 
+
+def generate_ips_from_intervals(intervals, output_file):
+    """
+    Generate a file with the IP addresses covered by a set of intervals.
+
+    Args:
+        intervals (iterable): Sorted, disjoint (start, end) pairs, e.g. from build_intervals.
+        output_file (str): Name and path of output file.
+    """
+    count = write_blocks(iter_interval_blocks(intervals), output_file)
     print(f"Printed {count} IPs to file {output_file}!")
 
 
+class OctetRanges:
+    """
+    The addresses of four per-octet (start, end, step) ranges, indexed by position.
+
+    Position p is split mixed-radix over the four octet ranges, so any address, any
+    contiguous slice of positions and the (start, end) intervals of a slice are
+    computed directly from the ranges. Nothing is built per address, whatever the
+    steps are, so sharding and random order run in constant memory. Positions are in
+    ascending address order, the same as itertools.product over the ranges.
+
+    Args:
+        first_octet_range (tuple): Range for the first octet of the IP address.
+        second_octet_range (tuple): Range for the second octet of the IP address.
+        third_octet_range (tuple): Range for the third octet of the IP address.
+        fourth_octet_range (tuple): Range for the fourth octet of the IP address.
+        start_index (int): Position of the first address to keep.
+        stop_index (int): Position after the last address to keep, or None for all.
+    """
+
+    def __init__(self, first_octet_range, second_octet_range, third_octet_range,
+                 fourth_octet_range, start_index=0, stop_index=None):
+        self.octet_ranges = (first_octet_range, second_octet_range, third_octet_range,
+                             fourth_octet_range)
+        self.values = [octet_values(octet_range) for octet_range in self.octet_ranges]
+        total = len(self.values[0]) * len(self.values[1]) * len(self.values[2]) * len(self.values[3])
+        self.start_index = start_index
+        self.stop_index = total if stop_index is None else stop_index
+
+    def __len__(self):
+        return self.stop_index - self.start_index
+
+    def _prefix(self, prefix_index):
+        # Integer value of the first three octets of the prefix_index-th /24 prefix
+        first, second, third = self.values[:3]
+        rest, third_index = divmod(prefix_index, len(third))
+        first_index, second_index = divmod(rest, len(second))
+        return (first[first_index] << 24) | (second[second_index] << 16) | (third[third_index] << 8)
+
+    def _prefix_slices(self):
+        # (prefix_index, low, high) for the fourth octet positions of every prefix in the slice
+        fourth_count = len(self.values[3])
+        if self.start_index >= self.stop_index:
+            return
+        for prefix_index in range(self.start_index // fourth_count,
+                                  (self.stop_index - 1) // fourth_count + 1):
+            offset = prefix_index * fourth_count
+            yield (prefix_index, max(self.start_index - offset, 0),
+                   min(self.stop_index - offset, fourth_count))
+
+    def address(self, index):
+        """
+        Look up the address at a position of the slice.
+
+        Args:
+            index (int): Position, from 0 to len() - 1.
+
+        Returns:
+            int: The address as an integer.
+        """
+        prefix_index, fourth_index = divmod(self.start_index + index, len(self.values[3]))
+        return self._prefix(prefix_index) | self.values[3][fourth_index]
+
+    def __iter__(self):
+        """
+        Iterate over the slice as intervals, merging runs of consecutive addresses.
+
+        Yields:
+            tuple: (start, end) as inclusive integers, in ascending order.
+        """
+        fourth = self.values[3]
+        pending = None
+        for prefix_index, low, high in self._prefix_slices():
+            prefix = self._prefix(prefix_index)
+            if fourth.step == 1:
+                spans = ((fourth[low], fourth[high - 1]),)
+            else:
+                spans = ((value, value) for value in fourth[low:high])
+            for span_start, span_end in spans:
+                if pending and pending[1] + 1 == prefix | span_start:
+                    pending = (pending[0], prefix | span_end)
+                    continue
+                if pending:
+                    yield pending
+                pending = (prefix | span_start, prefix | span_end)
+        if pending:
+            yield pending
+
+    def iter_blocks(self):
+        """
+        Lazily generate the addresses of the slice as text blocks, one per /24 prefix.
+
+        Yields:
+            tuple: (text block, number of addresses in the block).
+        """
+        tails = [f"{fourth}\n" for fourth in self.values[3]]
+        for prefix_index, low, high in self._prefix_slices():
+            prefix = int_to_ip(self._prefix(prefix_index)).rsplit(".", 1)[0] + "."
+            yield prefix + prefix.join(tails[low:high]), high - low
+
+    def iter_shuffled_ips(self, seed):
+        """
+        Lazily generate the addresses of the slice in a seeded random order.
+
+        Args:
+            seed (int): Seed for the permutation.
+
+        Yields:
+            str: Dotted-quad addresses.
+        """
+        for position in iter_permuted_indexes(len(self), seed):
+            yield int_to_ip(self.address(position))
+
+    def split(self, shards):
+        """
+        Split the slice into contiguous shards whose sizes differ by at most one address.
+
+        Args:
+            shards (int): Number of shards.
+
+        Returns:
+            list: One OctetRanges per shard.
+        """
+        total = len(self)
+        return [OctetRanges(*self.octet_ranges,
+                            start_index=self.start_index + total * index // shards,
+                            stop_index=self.start_index + total * (index + 1) // shards)
+                for index in range(shards)]
+
+
+def interval_offsets(intervals):
+    """
+    Compute the position of the first address of each interval.
+
+    Args:
+        intervals (list): Sorted, disjoint (start, end) pairs.
+
+    Returns:
+        list: Offsets, one per interval, followed by the total address count.
+    """
+    offsets = [0]
+    for start, end in intervals:
+        offsets.append(offsets[-1] + end - start + 1)
+    return offsets
+
+
+def slice_intervals(intervals, start_index, stop_index):
+    """
+    Select the addresses at positions start_index up to (not including) stop_index.
+
+    Args:
+        intervals (list): Sorted, disjoint (start, end) pairs.
+        start_index (int): Position of the first address to keep.
+        stop_index (int): Position after the last address to keep.
+
+    Returns:
+        list: Sorted, disjoint (start, end) pairs.
+    """
+    result = []
+    offset = 0
+    for start, end in intervals:
+        size = end - start + 1
+        low = max(start_index - offset, 0)
+        high = min(stop_index - offset, size)
+        if low < high:
+            result.append((start + low, start + high - 1))
+        offset += size
+        if offset >= stop_index:
+            break
+    return result
+
+
+def split_intervals(intervals, shards):
+    """
+    Split intervals into contiguous shards whose sizes differ by at most one address.
+
+    Args:
+        intervals (list): Sorted, disjoint (start, end) pairs.
+        shards (int): Number of shards.
+
+    Returns:
+        list: One list of (start, end) pairs per shard.
+    """
+    total = count_addresses(intervals)
+    return [slice_intervals(intervals, total * index // shards, total * (index + 1) // shards)
+            for index in range(shards)]
+
+
+def iter_permuted_indexes(total, seed):
+    """
+    Generate every position in range(total) exactly once, in a seeded pseudo-random order.
+
+    A full-period linear congruential generator modulo the next power of two (odd
+    increment, multiplier 1 mod 4) visits every value once; each value is scrambled
+    with an invertible xorshift-multiply step to spread neighbouring positions, and
+    values past total are skipped (at most half of them). Memory use is constant.
+
+    Args:
+        total (int): Number of positions.
+        seed (int): Seed for the permutation.
+
+    Yields:
+        int: Positions in permuted order.
+    """
+    if total <= 0:
+        return
+    bits = max((total - 1).bit_length(), 2)
+    mask = (1 << bits) - 1
+    shift = max(bits // 2, 1)
+    rng = random.Random(seed)
+    multiplier = (rng.getrandbits(bits) << 2 | 1) & mask
+    increment = (rng.getrandbits(bits) | 1) & mask
+    scramble = (rng.getrandbits(bits) | 1) & mask
+    state = rng.getrandbits(bits)
+    emitted = 0
+    while emitted < total:
+        state = (state * multiplier + increment) & mask
+        value = state ^ (state >> shift)
+        value = (value * scramble) & mask
+        value ^= value >> shift
+        if value < total:
+            emitted += 1
+            yield value
+
+
+def iter_shuffled_ips(intervals, seed):
+    """
+    Lazily generate the addresses covered by a set of intervals in a seeded random order.
+
+    Args:
+        intervals (list): Sorted, disjoint (start, end) pairs.
+        seed (int): Seed for the permutation.
+
+    Yields:
+        str: Dotted-quad addresses.
+    """
+    offsets = interval_offsets(intervals)
+    starts = [start for start, _ in intervals]
+    locate = bisect.bisect_right
+    for position in iter_permuted_indexes(offsets[-1], seed):
+        index = locate(offsets, position) - 1
+        yield int_to_ip(starts[index] + position - offsets[index])
+
+
+def shard_file_names(output_file, shards):
+    """
+    Build the output file name of every shard, e.g. gen-output-1.txt.
+
+    Args:
+        output_file (str): Name and path of the unsharded output file.
+        shards (int): Number of shards.
+
+    Returns:
+        list: File names, numbered from 1.
+    """
+    root, extension = os.path.splitext(output_file)
+    width = len(str(shards))
+    return [f"{root}-{index:0{width}d}{extension}" for index in range(1, shards + 1)]
+
+
+def write_shuffled(ips, output_files):
+    """
+    Append addresses dealt round-robin over the output files.
+
+    Args:
+        ips (iterable): Dotted-quad addresses, e.g. from iter_shuffled_ips.
+        output_files (list): Names and paths of the output files.
+
+    Returns:
+        list: Number of addresses written to each file.
+    """
+    shards = len(output_files)
+    counts = [0] * shards
+    outputs = [open(file_name, "a", encoding="utf-8") for file_name in output_files]
+    try:
+        buffers = [[] for _ in outputs]
+        index = 0
+        for ip_addr in ips:
+            buffer = buffers[index]
+            buffer.append(ip_addr)
+            if len(buffer) >= LINE_BUFFER_SIZE:
+                outputs[index].write("\n".join(buffer) + "\n")
+                counts[index] += len(buffer)
+                buffer.clear()
+            index = index + 1 if index + 1 < shards else 0
+        for output, buffer, shard in zip(outputs, buffers, range(shards)):
+            if buffer:
+                output.write("\n".join(buffer) + "\n")
+                counts[shard] += len(buffer)
+    finally:
+        for output in outputs:
+            output.close()
+    return counts
+
+
+def generate_ip_shards(intervals, output_file, shards=1, seed=None):
+    """
+    Generate one or more files with the IP addresses covered by a set of intervals.
+
+    Sequential output splits the addresses into contiguous, balanced shards. With a
+    seed the addresses are written in a pseudo-random order and dealt round-robin,
+    so every shard mixes all subnets. Both run in a single pass; memory grows with the
+    number of intervals, not addresses. Octet ranges go through generate_octet_shards,
+    since there every address of a stepped octet would be its own interval.
+
+    Args:
+        intervals (list): Sorted, disjoint (start, end) pairs.
+        output_file (str): Name and path of output file; shards get a "-N" suffix.
+        shards (int): Number of output files.
+        seed (int): Seed for random order, or None for ascending order.
+    """
+    output_files = shard_file_names(output_file, shards) if shards > 1 else [output_file]
+    if seed is None:
+        counts = [write_blocks(iter_interval_blocks(shard), file_name)
+                  for shard, file_name in zip(split_intervals(intervals, shards), output_files)]
+    else:
+        counts = write_shuffled(iter_shuffled_ips(intervals, seed), output_files)
+    for count, file_name in zip(counts, output_files):
+        print(f"Printed {count} IPs to file {file_name}!")
+
+
+def generate_octet_shards(octet_ranges, output_file, shards=1, seed=None):
+    """
+    Generate one or more files with the addresses of per-octet ranges.
+
+    Works like generate_ip_shards, but shards are position slices of the octet
+    ranges and random order maps permuted positions straight to octets, so memory
+    stays constant whatever the octet steps are.
+
+    Args:
+        octet_ranges (OctetRanges): The addresses to generate.
+        output_file (str): Name and path of output file; shards get a "-N" suffix.
+        shards (int): Number of output files.
+        seed (int): Seed for random order, or None for ascending order.
+    """
+    output_files = shard_file_names(output_file, shards) if shards > 1 else [output_file]
+    if seed is None:
+        counts = [write_blocks(shard.iter_blocks(), file_name)
+                  for shard, file_name in zip(octet_ranges.split(shards), output_files)]
+    else:
+        counts = write_shuffled(octet_ranges.iter_shuffled_ips(seed), output_files)
+    for count, file_name in zip(counts, output_files):
+        print(f"Printed {count} IPs to file {file_name}!")
+
+
+def write_binary(intervals, output_file, layout="auto"):
+    """
+    Write a set of intervals in the packed binary format.
+
+    The file is overwritten, since appending would invalidate its header. Intervals
+    are iterated twice and records are written in chunks, so an OctetRanges is
+    written without building its intervals.
+
+    Args:
+        intervals (iterable): Sorted, disjoint (start, end) pairs, e.g. a list or an
+                              OctetRanges.
+        output_file (str): Name and path of output file.
+        layout (str): "addresses", "intervals" or "auto" for whichever is smaller.
+
+    Returns:
+        int: Number of addresses written.
+
+    Raises:
+        ValueError: If the layout is unknown.
+    """
+    total = 0
+    interval_count = 0
+    for start, end in intervals:
+        total += end - start + 1
+        interval_count += 1
+    if layout == "auto":
+        layout = "addresses" if total <= 2 * interval_count else "intervals"
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown binary layout: {layout}")
+
+    if LAYOUTS[layout] == LAYOUT_INTERVALS:
+        # Lengths are uint32, so only the full /0 needs to be split
+        record_count = interval_count + (1 if total > 0xFFFFFFFF else 0)
+    else:
+        record_count = total
+
+    with open(output_file, "wb") as output:
+        output.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, LAYOUTS[layout], 0,
+                                        record_count, total))
+        if LAYOUTS[layout] == LAYOUT_INTERVALS:
+            words = iter_interval_words(intervals)
+            written = ARRAY_CHUNK_SIZE
+            while written == ARRAY_CHUNK_SIZE:
+                written = write_uint32(output, itertools.islice(words, ARRAY_CHUNK_SIZE))
+        else:
+            for start, end in intervals:
+                for chunk_start in range(start, end + 1, ARRAY_CHUNK_SIZE):
+                    write_uint32(output, range(chunk_start, min(chunk_start + ARRAY_CHUNK_SIZE, end + 1)))
+    return total
+
+
+def iter_interval_words(intervals):
+    """
+    Lazily generate the uint32 words of the interval layout.
+
+    Args:
+        intervals (iterable): Sorted, disjoint (start, end) pairs.
+
+    Yields:
+        int: start, length for every interval; the full /0 is split in two records.
+    """
+    for start, end in intervals:
+        yield start
+        yield min(end - start + 1, 0xFFFFFFFF)
+        if end - start + 1 > 0xFFFFFFFF:
+            yield 0xFFFFFFFF
+            yield 1
+
+
+def write_uint32(output, values):
+    """
+    Write integers to a binary file as little-endian uint32.
+
+    Args:
+        output (file): File opened in binary mode.
+        values (iterable): Integers between 0 and 2**32 - 1.
+
+    Returns:
+        int: Number of integers written.
+    """
+    packed = array.array("I", values)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    packed.tofile(output)
+    return len(packed)
+
+
+class BinaryTargetList:
+    """
+    Memory-mapped reader for the packed binary format.
+
+    Nothing is parsed up front: records are read straight from the mapping, so
+    opening a list of hundreds of millions of addresses is instant. Membership
+    checks bisect the sorted records.
+
+    Use as a context manager, or call close() when done. Views returned by shard()
+    point into the mapping and are released by close(), so they are only valid until then.
+
+    Args:
+        file_name (str): Path to a file written by write_binary.
+
+    Raises:
+        ValueError: If the file is not a binary target list.
+    """
+
+    def __init__(self, file_name):
+        with open(file_name, "rb") as binary_file:
+            header = binary_file.read(BINARY_HEADER.size)
+            if len(header) < BINARY_HEADER.size:
+                raise ValueError(f"Not a binary target list: {file_name}")
+            magic, version, self.layout, _, self.record_count, self.address_count = \
+                BINARY_HEADER.unpack(header)
+            if magic != BINARY_MAGIC or version != BINARY_VERSION or self.layout not in LAYOUTS.values():
+                raise ValueError(f"Not a binary target list: {file_name}")
+            words = self.record_count * (2 if self.layout == LAYOUT_INTERVALS else 1)
+            if os.fstat(binary_file.fileno()).st_size != BINARY_HEADER.size + 4 * words:
+                raise ValueError(f"Truncated binary target list: {file_name}")
+            self._mmap = mmap.mmap(binary_file.fileno(), 0, access=mmap.ACCESS_READ) if words else None
+
+        if self._mmap is None:
+            self._words = memoryview(array.array("I"))
+        elif sys.byteorder == "big":
+            # Big-endian hosts need a byte-swapped copy instead of a view
+            swapped = array.array("I", self._mmap[BINARY_HEADER.size:])
+            swapped.byteswap()
+            self._words = memoryview(swapped)
+        else:
+            self._words = memoryview(self._mmap)[BINARY_HEADER.size:].cast("I")
+        # Views handed out by shard(), released together with the mapping
+        self._exports = []
+        if self.layout == LAYOUT_INTERVALS:
+            self._starts = self._words[0::2]
+            self._lengths = self._words[1::2]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Release the memory mapping.
+        """
+        for view in self._exports:
+            view.release()
+        self._exports = []
+        if self.layout == LAYOUT_INTERVALS:
+            self._starts.release()
+            self._lengths.release()
+        self._words.release()
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Views sliced from a shard still point into the mapping; it is
+                # unmapped once they are garbage collected
+                pass
+            self._mmap = None
+
+    def __len__(self):
+        return self.address_count
+
+    def __iter__(self):
+        if self.layout == LAYOUT_ADDRESSES:
+            return iter(self._words)
+        return (number for start, end in self.intervals() for number in range(start, end + 1))
+
+    def __contains__(self, address):
+        """
+        Check membership in O(log n).
+
+        Args:
+            address (int or str): Address as an integer or dotted quad.
+
+        Returns:
+            bool: True if the address is in the list.
+        """
+        if isinstance(address, str):
+            address = int(ipaddress.IPv4Address(address))
+        if self.layout == LAYOUT_ADDRESSES:
+            index = bisect.bisect_left(self._words, address)
+            return index < len(self._words) and self._words[index] == address
+        index = bisect.bisect_right(self._starts, address) - 1
+        return index >= 0 and address < self._starts[index] + self._lengths[index]
+
+    def intervals(self):
+        """
+        Iterate over the list as intervals, merging runs of consecutive addresses.
+
+        Yields:
+            tuple: (start, end) as inclusive integers, in ascending order.
+        """
+        if self.layout == LAYOUT_INTERVALS:
+            pending = None
+            for start, length in zip(self._starts, self._lengths):
+                if pending and pending[1] + 1 == start:
+                    pending = (pending[0], start + length - 1)
+                    continue
+                if pending:
+                    yield pending
+                pending = (start, start + length - 1)
+            if pending:
+                yield pending
+            return
+        run_start = run_end = None
+        for number in self._words:
+            if run_end is not None and number == run_end + 1:
+                run_end = number
+                continue
+            if run_end is not None:
+                yield run_start, run_end
+            run_start = run_end = number
+        if run_end is not None:
+            yield run_start, run_end
+
+    def shard(self, index, shards):
+        """
+        Select one of N balanced, contiguous shards, as split_intervals would.
+
+        Args:
+            index (int): Shard number, from 0.
+            shards (int): Number of shards.
+
+        Returns:
+            memoryview or list: A zero-copy view of the addresses for the address
+            layout, valid until close(), or the shard's (start, end) pairs for the
+            interval layout.
+        """
+        start_index = self.address_count * index // shards
+        stop_index = self.address_count * (index + 1) // shards
+        if self.layout == LAYOUT_ADDRESSES:
+            view = self._words[start_index:stop_index]
+            self._exports.append(view)
+            return view
+        return slice_intervals(list(self.intervals()), start_index, stop_index)
+
+    def export_text(self, output_file):
+        """
+        Append the list to a text file, one dotted-quad address per line.
+
+        Args:
+            output_file (str): Name and path of output file.
+
+        Returns:
+            int: Number of addresses written.
+        """
+        return write_blocks(iter_interval_blocks(self.intervals()), output_file)
+
+
 def validate_ranges(ip_ranges):
     """
     Validate the IP ranges provided by the user.
@@ -77,15 +982,80 @@ def validate_ranges(ip_ranges):
     # Parse command line arguments
     parser = argparse.ArgumentParser(description="Generate a file with IP addresses")
     parser.add_argument("--output-file", "-o",
-                        default="gen-output.txt",
-                        help="Name and path of output file")
+                        help="Name and path of output file (default: gen-output.txt, or gen-output.bin "
+                             "with --binary)")
+    parser.add_argument("--target", "-t", nargs="+", default=[],
+                        help="CIDRs, dash ranges or addresses to generate (default: IP_RANGES)")
+    parser.add_argument("--target-file", "-T",
+                        help="File with one target per line")
+    parser.add_argument("--exclude", "-x", nargs="+", default=[],
+                        help="CIDRs, dash ranges or addresses to leave out")
+    parser.add_argument("--exclude-file", "-X",
+                        help="File with one exclusion per line")
+    parser.add_argument("--skip-reserved", action="store_true",
+                        help="Leave out reserved blocks (0/8, 127/8, 224/4, 240/4)")
+    parser.add_argument("--shards", "-n", type=int, default=1,
+                        help="Split the output into N balanced files")
+    parser.add_argument("--random", "-r", action="store_true",
+                        help="Write addresses in a pseudo-random order")
+    parser.add_argument("--seed", "-s", type=int, default=0,
+                        help="Seed for --random (default: 0)")
+    parser.add_argument("--binary", "-b", action="store_true",
+                        help="Write the packed binary format instead of text")
+    parser.add_argument("--layout", choices=["auto", *LAYOUTS], default="auto",
+                        help="Binary records: sorted addresses, intervals, or whichever is smaller")
+    parser.add_argument("--export-text", "-e", metavar="BINARY_FILE",
+                        help="Convert a binary target list to text in --output-file")
     args = parser.parse_args()
+    if args.output_file is None:
+        args.output_file = "gen-output.bin" if args.binary else "gen-output.txt"
+
+    if args.export_text:
+        try:
+            with BinaryTargetList(args.export_text) as target_list:
+                count = target_list.export_text(args.output_file)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        print(f"Printed {count} IPs to file {args.output_file}!")
+        sys.exit(0)
+
+    targets = args.target + (read_target_file(args.target_file) if args.target_file else [])
+    exclusions = args.exclude + (read_target_file(args.exclude_file) if args.exclude_file else [])
 
     try:
-        validate_ranges(IP_RANGES)
+        if args.shards < 1:
+            raise ValueError(f"--shards must be at least 1, got {args.shards}")
+        if args.binary and args.random:
+            raise ValueError("--binary lists are sorted and cannot be combined with --random")
+        if targets:
+            ip_intervals = build_intervals(targets, exclusions, args.skip_reserved)
+        elif exclusions or args.skip_reserved:
+            raise ValueError("--exclude and --skip-reserved need --target or --target-file")
+        else:
+            validate_ranges(IP_RANGES)
     except ValueError as e:
         print(f"Error: {e}")
         sys.exit(1)
 
-    # Generate the IP addresses and write them to the output file
-    generate_ips(**IP_RANGES, output_file=args.output_file)
+    # Generate the IP addresses and write them to the output file(s)
+    if args.binary:
+        if targets:
+            binary_shards = split_intervals(ip_intervals, args.shards)
+        else:
+            binary_shards = OctetRanges(**IP_RANGES).split(args.shards)
+        binary_files = shard_file_names(args.output_file, args.shards) if args.shards > 1 else [args.output_file]
+        for shard_intervals, binary_file in zip(binary_shards, binary_files):
+            count = write_binary(shard_intervals, binary_file, args.layout)
+            print(f"Wrote {count} IPs to binary file {binary_file}!")
+    elif args.shards > 1 or args.random:
+        if targets:
+            generate_ip_shards(ip_intervals, args.output_file, args.shards,
+                               args.seed if args.random else None)
+        else:
+            generate_octet_shards(OctetRanges(**IP_RANGES), args.output_file, args.shards,
+                                  args.seed if args.random else None)
+    elif targets:
+        generate_ips_from_intervals(ip_intervals, args.output_file)
+    else:
+        generate_ips(**IP_RANGES, output_file=args.output_file)
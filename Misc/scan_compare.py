@@ -6,22 +6,66 @@
 Description: This script performs several different types of Nmap scans on a list of 
              hosts and saves the results to a CSV file. You can provide additional
              Nmap flags as command-line arguments after the filename.
-             
+             Hosts are passed to Nmap in batches through an input list file (-iL) and
+             each host's state is read from Nmap's XML output; IPv6 hosts get batches
+             of their own, scanned with -6. Batches of all scan types run
+             concurrently under global and per-scan-type limits.
+             CIDRs and IP ranges are kept as integer ranges and expanded lazily, and
+             pandas is only imported to write the results.
+             scan_compare_check.py checks batching and per-host results against
+             the fake_nmap.py stand-in.
+
+Usage: scan_compare.py [options] filename [nmap flags...]
+
+    --batch-size: Number of hosts per Nmap invocation (default: 256).
+    --nmap: Nmap executable to run (default: nmap).
+    --jobs: Maximum number of Nmap invocations running at once (default: 4).
+    --jobs-per-scan: Maximum number of running invocations per scan type (default: 2).
+    --invocation-timeout: Seconds before an invocation is killed and its hosts
+                          reported down (default: no timeout).
+    --invocations-per-second: Maximum rate of new invocations (default: no limit).
+    --dns-workers: Number of DNS names resolved at once (default: 32).
+    --dns-ttl: Seconds a DNS answer or failure is cached (default: 300).
+    --hosts-file: Hosts-format file ("address name [aliases...]") answered before DNS.
+
 ADDITIONAL_FLAGS (list): A list of additional Nmap flags to be included in the scan command.
 """
 
+import argparse
+import asyncio
+import bisect
+import concurrent.futures
+import csv
+import itertools
 import subprocess
-import sys
 import os
+import tempfile
 import time
 import socket
 import re
 import ipaddress
-import pandas as pd
+import xml.etree.ElementTree as ET
+from typing import Iterable, Iterator
+
+
+# Any arguments to the script that are not its own options are treated like additional nmap flags
+ADDITIONAL_FLAGS = []
+
+NMAP_BINARY = "nmap"
 
+# Number of hosts passed to a single Nmap invocation
+BATCH_SIZE = 256
 
-# Any arguments to the script after the filename are to be treated like additional nmap flags
-ADDITIONAL_FLAGS = sys.argv[2:] if len(sys.argv) > 2 else []
+# Nmap invocations running at once, overall and per scan type
+MAX_JOBS = 4
+MAX_JOBS_PER_SCAN = 2
+
+# Result rows written to the CSV file at a time
+CSV_CHUNK_SIZE = 1 << 16
+
+# Number of DNS names resolved at once and seconds an answer or failure is cached
+DNS_WORKERS = 32
+DNS_CACHE_TTL = 300
 
 # Define the list of scans to perform as a dictionary
 SCAN_TYPES = {
@@ -35,26 +79,34 @@
     "ARP Scan": "-PR",
 }
 
-def expand_cidr_or_range(host: str) -> list:
+def parse_cidr_or_range(host: str):
     """
-    Takes an input string containing an IP address in CIDR notation or as an IP range, 
-    and returns a list of individual IP addresses.
+    Takes an input string containing an IP address, an IP address in CIDR notation or
+    an IP range, and returns the addresses it covers as an integer range.
+
+    CIDR blocks cover their usable hosts, as ipaddress's hosts() does. A range end
+    without a dot is a count added to the start address ("10.0.0.1-5" ends at 10.0.0.6).
 
     Parameters:
-        host (str): The input string containing an IP address in CIDR notation or as an IP range.
+        host (str): The input string containing an IP address, CIDR block or IP range.
 
     Returns:
-        list: A list of individual IP addresses.
+        tuple: (version, first, last) with inclusive integer bounds, or None if the
+               input cannot be parsed or the range is empty.
     """
-
     if '/' in host:
         try:
             network = ipaddress.ip_network(host, strict=False)
-            return [str(ip) for ip in network.hosts()]
         except ValueError as error:
             print(f"Error parsing CIDR notation {host}: {error}")
-            return []
-    elif '-' in host:
+            return None
+        first, last = int(network.network_address), int(network.broadcast_address)
+        if network.num_addresses > 2:
+            # Skip the network address, and for IPv4 the broadcast address too
+            first += 1
+            last -= 1 if network.version == 4 else 0
+        return network.version, first, last
+    if '-' in host:
         try:
             start_ip, end_ip = host.split('-')
             start_ip = ipaddress.ip_address(start_ip.strip())
@@ -62,12 +114,231 @@ def expand_cidr_or_range(host: str) -> list:
                 end_ip = ipaddress.ip_address(end_ip.strip())
             else:
                 end_ip = start_ip + int(end_ip.strip())
-            return [str(ip) for ip in range(int(start_ip), int(end_ip)+1)]
         except ValueError as error:
             print(f"Error parsing IP range {host}: {error}")
-            return []
-    else:
-        return [host]
+            return None
+        if end_ip.version != start_ip.version or end_ip < start_ip:
+            return None
+        return start_ip.version, int(start_ip), int(end_ip)
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError as error:
+        print(f"Error parsing IP address {host}: {error}")
+        return None
+    return address.version, int(address), int(address)
+
+def ip_from_int(version: int, number: int) -> str:
+    """
+    Format an integer as an IP address.
+
+    Parameters:
+        version (int): 4 or 6.
+        number (int): The address as an integer.
+
+    Returns:
+        str: Dotted-quad IPv4 address or compressed IPv6 address.
+    """
+    if version == 4:
+        return f"{number >> 24}.{(number >> 16) & 255}.{(number >> 8) & 255}.{number & 255}"
+    return str(ipaddress.IPv6Address(number))
+
+def iter_addresses(host_ranges: Iterable[tuple]) -> Iterator[str]:
+    """
+    Lazily expand integer ranges into individual IP addresses.
+
+    Parameters:
+        host_ranges (iterable): (version, first, last) ranges.
+
+    Yields:
+        str: IP addresses, in range order.
+    """
+    for version, first, last in host_ranges:
+        for number in range(first, last + 1):
+            yield ip_from_int(version, number)
+
+def expand_cidr_or_range(host: str) -> Iterator[str]:
+    """
+    Takes an input string containing an IP address in CIDR notation or as an IP range, 
+    and lazily generates the individual IP addresses.
+
+    Parameters:
+        host (str): The input string containing an IP address in CIDR notation or as an IP range.
+
+    Returns:
+        Iterator[str]: The individual IP addresses.
+    """
+    host_range = parse_cidr_or_range(host)
+    return iter_addresses([host_range] if host_range else [])
+
+def merge_host_ranges(host_ranges: Iterable[tuple]) -> list:
+    """
+    Sort ranges and merge the ones that overlap or touch, so every address appears once.
+
+    Parameters:
+        host_ranges (iterable): (version, first, last) ranges.
+
+    Returns:
+        list: Sorted, disjoint (version, first, last) ranges.
+    """
+    merged = []
+    for version, first, last in sorted(host_ranges):
+        if merged and merged[-1][0] == version and first <= merged[-1][2] + 1:
+            if last > merged[-1][2]:
+                merged[-1] = (version, merged[-1][1], last)
+        else:
+            merged.append((version, first, last))
+    return merged
+
+def iter_batches(host_ranges: Iterable[tuple], batch_size: int) -> Iterator[list]:
+    """
+    Lazily cut ranges into batches of at most batch_size addresses. A batch only
+    holds addresses of one IP version, since Nmap needs -6 to scan IPv6 targets.
+
+    Parameters:
+        host_ranges (iterable): (version, first, last) ranges.
+        batch_size (int): Number of addresses per batch.
+
+    Yields:
+        list: (version, first, last) ranges covering one batch.
+    """
+    batch = []
+    size = 0
+    for version, first, last in host_ranges:
+        if batch and batch[-1][0] != version:
+            yield batch
+            batch = []
+            size = 0
+        while first <= last:
+            take = min(last - first + 1, batch_size - size)
+            batch.append((version, first, first + take - 1))
+            size += take
+            first += take
+            if size == batch_size:
+                yield batch
+                batch = []
+                size = 0
+    if batch:
+        yield batch
+
+class DnsCache:
+    """
+    In-process cache of DNS answers, including failures, each kept for `ttl` seconds.
+
+    Parameters:
+        ttl (float): Seconds an entry stays valid.
+    """
+
+    def __init__(self, ttl: float=DNS_CACHE_TTL):
+        self.ttl = ttl
+        self.entries = {}
+
+    def get(self, name: str):
+        """
+        Look up a name.
+
+        Parameters:
+            name (str): DNS name.
+
+        Returns:
+            tuple: The cached addresses (empty for a cached failure), or None if the
+                   name is not cached or its entry has expired.
+        """
+        entry = self.entries.get(name.lower())
+        if entry is None:
+            return None
+        expires, addresses = entry
+        if expires is not None and expires < time.monotonic():
+            del self.entries[name.lower()]
+            return None
+        return addresses
+
+    def put(self, name: str, addresses, ttl: float=None, permanent: bool=False):
+        """
+        Store the answer for a name.
+
+        Parameters:
+            name (str): DNS name.
+            addresses (iterable): Resolved addresses; empty records a failure.
+            ttl (float, optional): Seconds to keep the entry instead of the cache default.
+            permanent (bool, optional): Never expire the entry (used for hosts files).
+        """
+        expires = None if permanent else time.monotonic() + (self.ttl if ttl is None else ttl)
+        self.entries[name.lower()] = (expires, tuple(addresses))
+
+DNS_CACHE = DnsCache()
+
+def lookup_addresses(host: str, resolver=socket.getaddrinfo) -> tuple:
+    """
+    Resolve a DNS name to all of its IPv4 (A) and IPv6 (AAAA) addresses.
+
+    Parameters:
+        host (str): The input string containing a DNS name.
+        resolver (callable, optional): getaddrinfo-compatible function, e.g. a stub for tests.
+
+    Returns:
+        tuple: Unique addresses in resolver order; empty if the name cannot be resolved.
+    """
+    try:
+        answers = resolver(host, None, socket.AF_UNSPEC, socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError):
+        return ()
+    return tuple(dict.fromkeys(sockaddr[0] for family, _, _, _, sockaddr in answers
+                               if family in (socket.AF_INET, socket.AF_INET6)))
+
+def resolve_hosts(names, workers: int=DNS_WORKERS, cache: DnsCache=DNS_CACHE,
+                  resolver=socket.getaddrinfo) -> dict:
+    """
+    Resolve DNS names concurrently, answering cached names (and cached failures) directly.
+
+    Parameters:
+        names (iterable): DNS names.
+        workers (int, optional): Number of names resolved at once.
+        cache (DnsCache, optional): Cache consulted first and updated with new answers.
+        resolver (callable, optional): getaddrinfo-compatible function, e.g. a stub for tests.
+
+    Returns:
+        dict: Name to a tuple of addresses; empty for names that cannot be resolved.
+    """
+    answers = {}
+    pending = []
+    for name in dict.fromkeys(names):
+        cached = cache.get(name)
+        if cached is None:
+            pending.append(name)
+        else:
+            answers[name] = cached
+    if pending:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            for name, addresses in zip(pending, executor.map(lambda name: lookup_addresses(name, resolver),
+                                                             pending)):
+                cache.put(name, addresses)
+                answers[name] = addresses
+                if not addresses:
+                    print(f"Could not resolve {name}")
+    return answers
+
+def load_hosts_file(file_name: str, cache: DnsCache=DNS_CACHE) -> int:
+    """
+    Answer names from a hosts-format file ("address name [aliases...]") instead of DNS.
+
+    Parameters:
+        file_name (str): Path to the hosts file.
+        cache (DnsCache, optional): Cache that receives permanent entries.
+
+    Returns:
+        int: Number of names loaded.
+    """
+    names = {}
+    with open(file_name, encoding="utf-8") as hosts_file:
+        for line in hosts_file:
+            fields = line.split("#", 1)[0].split()
+            if len(fields) < 2:
+                continue
+            for name in fields[1:]:
+                names.setdefault(name, []).append(fields[0])
+    for name, addresses in names.items():
+        cache.put(name, dict.fromkeys(addresses), permanent=True)
+    return len(names)
 
 def resolve_dns(host: str) -> str:
     """
@@ -78,101 +349,397 @@ def resolve_dns(host: str) -> str:
         host (str): The input string containing a DNS name.
 
     Returns:
-        str: The resolved IP address or "N/A" if the DNS name cannot be resolved.
+        str: The first resolved IP address or "N/A" if the DNS name cannot be resolved.
     """
-    try:
-        ip_addr = socket.gethostbyname(host)
-        return ip_addr
-    except socket.gaierror:
-        return "N/A"
+    addresses = resolve_hosts([host])[host]
+    return addresses[0] if addresses else "N/A"
 
-def process_hosts(hosts_list: pd.DataFrame) -> pd.DataFrame:
+def process_hosts(host_lines: Iterable[str], dns_workers: int=DNS_WORKERS) -> list:
     """
-    Takes a DataFrame containing hosts as input and processes them to generate a new 
-    DataFrame with individual IP addresses.
+    Takes the lines of a hosts list and turns them into compact integer ranges.
     For each host, it checks if it is in CIDR notation, an IP range, or a DNS name. 
-    It then expands the CIDR notation or range, and resolves the DNS name.
+    CIDR blocks and ranges stay as a single range each, and DNS names are resolved
+    concurrently to all of their A and AAAA addresses. Use iter_addresses to expand
+    the result.
 
     Parameters:
-        hosts (pd.DataFrame): The input DataFrame containing hosts as rows.
+        host_lines (iterable): Hosts, one per item.
+        dns_workers (int, optional): Number of DNS names resolved at once.
 
     Returns:
-        pd.DataFrame: A DataFrame with the processed hosts.
-    """
-    processed_hosts = []
-    for _, row in hosts_list.iterrows():
-        host = row[0]
-        if re.match(r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}', host):
-            expanded_hosts = expand_cidr_or_range(host)
-            processed_hosts.extend(expanded_hosts)
+        list: (version, first, last) ranges in the order of the input.
+    """
+    rows = [host.strip() for host in host_lines if host.strip()]
+    is_address = [bool(re.match(r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}', host)) or ':' in host
+                  for host in rows]
+    answers = resolve_hosts([host for host, address in zip(rows, is_address) if not address], dns_workers)
+
+    host_ranges = []
+    for host, address in zip(rows, is_address):
+        if address:
+            host_range = parse_cidr_or_range(host)
+            if host_range:
+                host_ranges.append(host_range)
         else:
-            ip_addr = resolve_dns(host)
-            if ip_addr != "N/A":
-                processed_hosts.append(ip_addr)
-    return pd.DataFrame(processed_hosts)
+            host_ranges.extend(parse_cidr_or_range(ip_addr) for ip_addr in answers[host])
+    return host_ranges
 
-def perform_scan(cmd: str, host_list: pd.DataFrame, additional_flags: list=None) -> pd.Series:
+def normalize_address(host: str) -> str:
     """
-    Perform an Nmap scan on a list of hosts and return a Pandas Series with the scan results.
+    Normalize an IP address so Nmap's spelling of it matches the input list.
+
+    Parameters:
+        host (str): An IP address or any other host string.
+
+    Returns:
+        str: The compressed IP address, or the host unchanged if it is not an IP address.
+    """
+    try:
+        return str(ipaddress.ip_address(host))
+    except ValueError:
+        return host
+
+def parse_nmap_xml(xml_output: bytes) -> dict:
+    """
+    Read the state of every host from Nmap's XML output.
+
+    Parameters:
+        xml_output (bytes): Output of Nmap run with "-oX -".
+
+    Returns:
+        dict: Normalized IP address to True if the host is up, False otherwise.
+    """
+    states = {}
+    for host in ET.fromstring(xml_output).iter("host"):
+        status = host.find("status")
+        is_up = status is not None and status.get("state") == "up"
+        for address in host.findall("address"):
+            if address.get("addrtype") in ("ipv4", "ipv6"):
+                key = normalize_address(address.get("addr", ""))
+                states[key] = states.get(key, False) or is_up
+    return states
+
+class HostStates:
+    """
+    Hosts found up by one scan type, kept as one bitmap per scanned range.
+
+    A range's bitmap takes one bit per address and is only allocated once a host in
+    it is marked up, so memory stays flat however many hosts are up.
+
+    Parameters:
+        host_ranges (list): Sorted, disjoint (version, first, last) ranges, as returned
+                            by merge_host_ranges.
+    """
+
+    def __init__(self, host_ranges: list):
+        self.ranges = host_ranges
+        self.starts = [(version, first) for version, first, _ in host_ranges]
+        self.bitmaps = [None] * len(host_ranges)
+
+    def _locate(self, version: int, number: int) -> tuple:
+        index = bisect.bisect_right(self.starts, (version, number)) - 1
+        if index < 0:
+            return None, 0
+        range_version, first, last = self.ranges[index]
+        if range_version != version or number > last:
+            return None, 0
+        return index, number - first
+
+    def mark_up(self, host: str):
+        """
+        Record a host as up; addresses outside the scanned ranges are ignored.
+
+        Parameters:
+            host (str): IP address, as reported by Nmap.
+        """
+        try:
+            address = ipaddress.ip_address(host)
+        except ValueError:
+            return
+        index, offset = self._locate(address.version, int(address))
+        if index is None:
+            return
+        if self.bitmaps[index] is None:
+            _, first, last = self.ranges[index]
+            self.bitmaps[index] = bytearray((last - first) // 8 + 1)
+        self.bitmaps[index][offset >> 3] |= 1 << (offset & 7)
+
+    def is_up(self, version: int, number: int) -> bool:
+        """
+        Check whether a host was found up.
+
+        Parameters:
+            version (int): 4 or 6.
+            number (int): The address as an integer.
+
+        Returns:
+            bool: True if the host is up.
+        """
+        index, offset = self._locate(version, number)
+        if index is None or self.bitmaps[index] is None:
+            return False
+        return bool(self.bitmaps[index][offset >> 3] & (1 << (offset & 7)))
+
+class RateLimiter:
+    """
+    Space out the start of Nmap invocations to at most `rate` per second.
+
+    Parameters:
+        rate (float): Invocations per second, or None for no limit.
+    """
+
+    def __init__(self, rate: float=None):
+        self.interval = 1 / rate if rate else 0
+        self.next_start = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        """
+        Wait until the next invocation may start.
+        """
+        if not self.interval:
+            return
+        async with self.lock:
+            loop = asyncio.get_running_loop()
+            delay = self.next_start - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.next_start = max(loop.time(), self.next_start) + self.interval
+
+async def scan_batch(cmd: str, batch: list, additional_flags: list, nmap_binary: str=NMAP_BINARY,
+                     timeout: float=None, ipv6: bool=False) -> dict:
+    """
+    Run one Nmap invocation over a batch of hosts passed through an input list file.
+
+    Parameters:
+        cmd (str): The Nmap command-line option for the scan type.
+        batch (list): Hosts to scan.
+        additional_flags (list): Additional Nmap flags to be included in the scan command.
+        nmap_binary (str): Nmap executable to run.
+        timeout (float): Seconds before the invocation is killed, or None for no timeout.
+        ipv6 (bool): The batch holds IPv6 addresses, so Nmap is run with -6.
+
+    Returns:
+        dict: Normalized IP address to scan result; empty if the scan failed or timed out.
+    """
+    with tempfile.NamedTemporaryFile("w", prefix="scan_compare-", suffix=".txt",
+                                     delete=False) as host_file:
+        host_file.write("\n".join(batch) + "\n")
+    nmap_command = [nmap_binary, cmd, "-iL", host_file.name, "-oX", "-"] + additional_flags
+    if ipv6 and "-6" not in additional_flags:
+        nmap_command.append("-6")
+    try:
+        process = await asyncio.create_subprocess_exec(*nmap_command, stdout=subprocess.PIPE,
+                                                       stderr=subprocess.PIPE)
+        try:
+            output, error_output = await asyncio.wait_for(process.communicate(), timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            print(f"Timed out after {timeout} seconds scanning {len(batch)} hosts with command "
+                  f"{' '.join(nmap_command)}")
+            return {}
+    finally:
+        os.unlink(host_file.name)
+    if process.returncode != 0:
+        print(f"Error scanning {len(batch)} hosts with command {' '.join(nmap_command)}: "
+              f"{(error_output or output).decode('utf-8').strip()}")
+        return {}
+    try:
+        return parse_nmap_xml(output)
+    except ET.ParseError as error:
+        print(f"Error parsing XML output of {' '.join(nmap_command)}: {error}")
+        return {}
+
+async def scan_all(scan_types: dict, host_ranges: list, additional_flags: list=None,
+                   batch_size: int=BATCH_SIZE, nmap_binary: str=NMAP_BINARY, max_jobs: int=MAX_JOBS,
+                   max_jobs_per_scan: int=MAX_JOBS_PER_SCAN, timeout: float=None, rate: float=None,
+                   report: bool=True) -> dict:
+    """
+    Run every scan type over the hosts, batching hosts and running batches concurrently.
+
+    Each scan type runs max_jobs_per_scan workers that take batches from a lazy
+    iterator over the merged ranges, so addresses are only expanded one batch at a
+    time. A worker then waits for a global slot and for the rate limiter. IPv4 and
+    IPv6 addresses go to separate batches, and IPv6 batches are scanned with -6.
+
+    Parameters:
+        scan_types (dict): Scan name to Nmap command-line option.
+        host_ranges (list): (version, first, last) ranges to scan; overlaps are scanned once.
+        additional_flags (list, optional): Additional Nmap flags to be included in the scan command.
+        batch_size (int, optional): Number of hosts per Nmap invocation.
+        nmap_binary (str, optional): Nmap executable to run.
+        max_jobs (int, optional): Maximum number of Nmap invocations running at once.
+        max_jobs_per_scan (int, optional): Maximum number of running invocations per scan type.
+        timeout (float, optional): Seconds before an invocation is killed.
+        rate (float, optional): Maximum number of invocations started per second.
+        report (bool, optional): Print when each scan type starts and completes.
+
+    Returns:
+        dict: Scan name to the HostStates of the hosts it found up.
+    """
+    if additional_flags is None:
+        additional_flags = []
+    unique_ranges = merge_host_ranges(host_ranges)
+
+    global_slots = asyncio.Semaphore(max_jobs)
+    limiter = RateLimiter(rate)
+    states = {scan_type: HostStates(unique_ranges) for scan_type in scan_types}
+    start_times = {}
+
+    def start(scan_type):
+        if scan_type not in start_times:
+            start_times[scan_type] = time.time()
+            if report:
+                print(f"Performing {scan_type} scan")
+
+    async def run_scan_type(scan_type):
+        batches = iter_batches(unique_ranges, batch_size)
+
+        async def worker():
+            for batch in batches:
+                async with global_slots:
+                    await limiter.wait()
+                    start(scan_type)
+                    result = await scan_batch(scan_types[scan_type], list(iter_addresses(batch)),
+                                              additional_flags, nmap_binary, timeout,
+                                              ipv6=batch[0][0] == 6)
+                for host, is_up in result.items():
+                    if is_up:
+                        states[scan_type].mark_up(host)
+
+        await asyncio.gather(*(worker() for _ in range(max_jobs_per_scan)))
+        start(scan_type)
+        if report:
+            print(f"Completed {scan_type} scan in {time.time() - start_times[scan_type]:.2f} seconds")
+
+    await asyncio.gather(*(run_scan_type(scan_type) for scan_type in scan_types))
+    return states
+
+def iter_result_rows(host_ranges: list, scan_states: dict, scan_types: Iterable[str]) -> Iterator[tuple]:
+    """
+    Lazily map scan results back to every host, in the order of the hosts list.
+
+    Parameters:
+        host_ranges (list): (version, first, last) ranges, as returned by process_hosts.
+        scan_states (dict): Scan name to HostStates, as returned by scan_all.
+        scan_types (iterable): Scan names, in column order.
+
+    Yields:
+        tuple: The host followed by one boolean scan result per scan type.
+    """
+    states = [scan_states[scan_type] for scan_type in scan_types]
+    for version, first, last in host_ranges:
+        for number in range(first, last + 1):
+            yield (ip_from_int(version, number),
+                   *[scan_state.is_up(version, number) for scan_state in states])
+
+def write_results(rows: Iterable[tuple], columns: list, file_name: str="results.csv"):
+    """
+    Write result rows to a CSV file, CSV_CHUNK_SIZE rows at a time.
+
+    Parameters:
+        rows (iterable): Result rows, as generated by iter_result_rows.
+        columns (list): Column names.
+        file_name (str, optional): Path to the CSV file.
+    """
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    rows = iter(rows)
+    with open(file_name, "w", encoding="utf-8", newline="") as csv_file:
+        header = True
+        while True:
+            chunk = list(itertools.islice(rows, CSV_CHUNK_SIZE))
+            if chunk or header:
+                pd.DataFrame(chunk, columns=columns).to_csv(csv_file, header=header, index=False)
+            header = False
+            if len(chunk) < CSV_CHUNK_SIZE:
+                break
+
+def perform_scan(cmd: str, host_list: Iterable[str], additional_flags: list=None,
+                 batch_size: int=BATCH_SIZE, nmap_binary: str=NMAP_BINARY,
+                 dns_workers: int=DNS_WORKERS) -> list:
+    """
+    Perform an Nmap scan on a list of hosts and return the scan results.
+
+    Unique hosts are scanned in batches of batch_size per Nmap invocation and the
+    results are mapped back to every entry of host_list.
     
     Args:
         cmd (str): The Nmap command-line option for the scan type.
-        host_list (pd.DataFrame): A dataframe containing a list of hosts to be scanned.
+        host_list (iterable): IP addresses, CIDR blocks, IP ranges or DNS names to be scanned.
         additional_flags (list, optional): A list of additional Nmap flags to be included 
                                            in the scan command.
+        batch_size (int, optional): Number of hosts per Nmap invocation.
+        nmap_binary (str, optional): Nmap executable to run.
+        dns_workers (int, optional): Number of DNS names resolved at once.
         
     Returns:
-        pd.Series: A Pandas Series with boolean values representing the scan results for each host.
+        list: Boolean scan results, one for each expanded host.
     """
-    is_up = []
-    if additional_flags is None:
-        additional_flags = []
-    for _, row in host_list.iterrows():
-        host = row[0]
-        nmap_command = ["nmap", cmd, host] + additional_flags
-        try:
-            output = subprocess.check_output(nmap_command)
-        except subprocess.CalledProcessError as error:
-            print(f"Error scanning {host} with command {' '.join(nmap_command)}: "
-                  f"{error.output.decode('utf-8').strip()}")
-            is_up.append(False)
-            continue
-        output = output.decode("utf-8")
-        if "Host is up" in output:
-            is_up.append(True)
-        else:
-            is_up.append(False)
-    return pd.Series(is_up)
-
-
-# Read the target hosts from a file specified in the command-line argument
-if len(sys.argv) < 2:
-    print("Usage: scan_compare.py [filename]")
-    sys.exit(1)
-
-FILENAME = sys.argv[1]
-hosts = pd.read_csv(FILENAME, header=None)
-
-# Process the hosts list
-hosts = process_hosts(hosts)
-
-# Disable scans that require root privileges on non-root accounts or that don't work on Windows
-if os.geteuid() != 0:
-    SCAN_TYPES.pop("NULL Scan")
-    SCAN_TYPES.pop("FIN Scan")
-    SCAN_TYPES.pop("XMAS Scan")
-
-# Perform the scans for each type of scan and save the results to a dictionary
-results = {}
-for scan_type, nmap_cmd in SCAN_TYPES.items():
-    print(f"Performing {scan_type} scan")
-    start_time = time.time()
-    results[scan_type] = perform_scan(nmap_cmd, hosts, ADDITIONAL_FLAGS)
-    end_time = time.time()
-    print(f"Completed {scan_type} scan in {end_time - start_time:.2f} seconds")
-
-# Create a Pandas dataframe with the results and write it to a CSV file
-df = pd.concat([hosts, pd.DataFrame(results)], axis=1)
-df.columns = ["Host"] + [f"{scan_type} ({arg})" for scan_type, arg in SCAN_TYPES.items()]
-df.to_csv("results.csv", index=False)
-print("Results saved to results.csv")
+    host_ranges = process_hosts(host_list, dns_workers)
+    states = asyncio.run(scan_all({cmd: cmd}, host_ranges, additional_flags, batch_size, nmap_binary,
+                                  report=False))
+    return [is_up for _, is_up in iter_result_rows(host_ranges, states, [cmd])]
+
+
+if __name__ == "__main__":
+    # Read the target hosts from a file specified in the command-line argument
+    parser = argparse.ArgumentParser(
+        description="Compare Nmap host discovery scans over a list of hosts",
+        usage="scan_compare.py [options] filename [nmap flags...]",
+        allow_abbrev=False)
+    parser.add_argument("filename", help="File with one host, CIDR or IP range per line")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help=f"Number of hosts per Nmap invocation (default: {BATCH_SIZE})")
+    parser.add_argument("--nmap", default=NMAP_BINARY,
+                        help=f"Nmap executable to run (default: {NMAP_BINARY})")
+    parser.add_argument("--jobs", type=int, default=MAX_JOBS,
+                        help=f"Maximum number of Nmap invocations running at once (default: {MAX_JOBS})")
+    parser.add_argument("--jobs-per-scan", type=int, default=MAX_JOBS_PER_SCAN,
+                        help="Maximum number of running invocations per scan type "
+                             f"(default: {MAX_JOBS_PER_SCAN})")
+    parser.add_argument("--invocation-timeout", type=float,
+                        help="Seconds before an invocation is killed and its hosts reported down")
+    parser.add_argument("--invocations-per-second", type=float,
+                        help="Maximum rate of new Nmap invocations")
+    parser.add_argument("--dns-workers", type=int, default=DNS_WORKERS,
+                        help=f"Number of DNS names resolved at once (default: {DNS_WORKERS})")
+    parser.add_argument("--dns-ttl", type=float, default=DNS_CACHE_TTL,
+                        help=f"Seconds a DNS answer or failure is cached (default: {DNS_CACHE_TTL})")
+    parser.add_argument("--hosts-file",
+                        help="Hosts-format file (\"address name [aliases...]\") answered before DNS")
+    args, ADDITIONAL_FLAGS = parser.parse_known_args()
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    if args.jobs < 1 or args.jobs_per_scan < 1:
+        parser.error("--jobs and --jobs-per-scan must be at least 1")
+    if args.dns_workers < 1:
+        parser.error("--dns-workers must be at least 1")
+
+    DNS_CACHE.ttl = args.dns_ttl
+    if args.hosts_file:
+        load_hosts_file(args.hosts_file)
+
+    FILENAME = args.filename
+    with open(FILENAME, encoding="utf-8", newline="") as hosts_file:
+        hosts = [row[0] for row in csv.reader(hosts_file) if row]
+
+    # Process the hosts list into compact ranges that are expanded lazily
+    hosts = process_hosts(hosts, args.dns_workers)
+
+    # Disable scans that require root privileges on non-root accounts or that don't work on Windows
+    if os.geteuid() != 0:
+        SCAN_TYPES.pop("NULL Scan")
+        SCAN_TYPES.pop("FIN Scan")
+        SCAN_TYPES.pop("XMAS Scan")
+
+    # Perform the scans concurrently; each scan type reports its own elapsed time
+    scan_states = asyncio.run(scan_all(
+        SCAN_TYPES, hosts, ADDITIONAL_FLAGS, args.batch_size, args.nmap, args.jobs,
+        args.jobs_per_scan, args.invocation_timeout, args.invocations_per_second))
+
+    # Write the results for every host to a CSV file
+    write_results(iter_result_rows(hosts, scan_states, SCAN_TYPES),
+                  ["Host"] + [f"{scan_type} ({arg})" for scan_type, arg in SCAN_TYPES.items()])
+    print("Results saved to results.csv")
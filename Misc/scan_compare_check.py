@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+"""
+Description: Checks scan_compare.py's batched scanning against fake_nmap.py. The
+             hosts list mixes a CIDR block, an overlapping dash range, IPv6 addresses
+             and a DNS name. The check verifies that:
+             - every Nmap invocation scans several hosts;
+             - every host is scanned exactly once, with -6 only for IPv6 batches;
+             - each host's result matches the state the fake reported for it.
+
+Usage: scan_compare_check.py
+"""
+
+import os
+import sys
+import tempfile
+
+import fake_nmap
+import scan_compare
+
+FAKE_NMAP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_nmap.py")
+
+CHECK_BATCH_SIZE = 4
+
+CHECK_HOSTS = ["10.0.0.0/28", "10.0.0.12-10.0.0.20", "2001:db8::1-7", "check.invalid"]
+
+# Answered from the DNS cache, so the check does not depend on a resolver
+CHECK_DNS = {"check.invalid": ("10.0.1.3", "2001:db8::30")}
+
+
+def check_batching() -> list:
+    """
+    Run a scan of CHECK_HOSTS with fake_nmap.py and check batching and attribution.
+
+    Returns:
+        list: Descriptions of every check that failed.
+    """
+    for name, addresses in CHECK_DNS.items():
+        scan_compare.DNS_CACHE.put(name, addresses, permanent=True)
+    hosts = list(scan_compare.iter_addresses(scan_compare.process_hosts(CHECK_HOSTS)))
+
+    with tempfile.TemporaryDirectory(prefix="scan_compare_check-") as log_dir:
+        log_file = os.path.join(log_dir, "invocations.log")
+        os.environ["FAKE_NMAP_LOG"] = log_file
+        try:
+            results = scan_compare.perform_scan("-sn", CHECK_HOSTS, batch_size=CHECK_BATCH_SIZE,
+                                                nmap_binary=FAKE_NMAP)
+        finally:
+            del os.environ["FAKE_NMAP_LOG"]
+        with open(log_file, encoding="utf-8") as log:
+            invocations = [line.split() for line in log]
+
+    failures = []
+    scanned = [host for invocation in invocations for host in invocation[1:]]
+    if len(invocations) >= len(scanned):
+        failures.append(f"{len(invocations)} invocations for {len(scanned)} hosts")
+    if sorted(scanned) != sorted(set(hosts)):
+        failures.append("scanned hosts do not match the unique hosts of the list")
+    for family, *batch in invocations:
+        if len(batch) > CHECK_BATCH_SIZE:
+            failures.append(f"batch of {len(batch)} hosts exceeds {CHECK_BATCH_SIZE}")
+        if any(("." in host) != (family == "ipv4") for host in batch):
+            failures.append(f"{family} invocation scanned {' '.join(batch)}")
+    for host, is_up in zip(hosts, results):
+        if is_up != fake_nmap.is_up(host):
+            failures.append(f"{host}: expected {fake_nmap.is_up(host)}, got {is_up}")
+    if len(results) != len(hosts):
+        failures.append(f"{len(results)} results for {len(hosts)} hosts")
+    return failures
+
+
+if __name__ == "__main__":
+    failed = check_batching()
+    for failure in failed:
+        print(f"FAIL {failure}")
+    print("Batching check: " + ("failed" if failed else "passed"))
+
+    if failed:
+        sys.exit(1)
@@ -3,20 +3,160 @@
 This script reads an XML file generated by nmap, identifies all hosts running a web service over SSL,
 and writes these as 'host:port' to an output file.
 If the a flag is given, it outputs all hostport combos. 
+If the s flag is given, the XML is parsed incrementally so very large scans use constant memory.
+Several files, directories or glob patterns may be given to -i; they are parsed across a process
+pool (-j) and merged into one deduplicated list sorted by IP and port.
+The --service, --port, --protocol, --state and --tunnel filters replace the SSL check with a custom query.
+If the c flag is given, each XML file is compiled once into an indexed SQLite cache and later runs
+are answered from it without re-parsing.
+If the f flag is given, a scan still being written with -oX is tailed and each 'host:port' is emitted
+as soon as its host block is complete, exiting when </nmaprun> appears.
 """
 
 import os
+import sys
+import time
+import glob
+import hashlib
+import ipaddress
+import sqlite3
 import xml.etree.ElementTree as ET
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 
+# Default port query: webservers supporting SSL
+SSL_WEB_QUERY = {'service': ['http', 'https'], 'tunnel': ['ssl']}
 
-def extract_host_port_from_nmap_xml(xml_file, all_ports=False):
+# Port record fields that can be queried
+QUERY_FIELDS = ('portid', 'protocol', 'state', 'service', 'tunnel')
+
+DEFAULT_CACHE = os.path.join(os.path.expanduser('~'), '.cache', 'nmap2hp.sqlite')
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ports (
+    seq INTEGER PRIMARY KEY,
+    source_id INTEGER NOT NULL,
+    ip TEXT,
+    portid TEXT,
+    protocol TEXT,
+    state TEXT,
+    service TEXT,
+    tunnel TEXT
+);
+CREATE INDEX IF NOT EXISTS ports_service ON ports (source_id, service);
+CREATE INDEX IF NOT EXISTS ports_portid ON ports (source_id, portid);
+CREATE INDEX IF NOT EXISTS ports_tunnel ON ports (source_id, tunnel);
+CREATE INDEX IF NOT EXISTS ports_state ON ports (source_id, state);
+"""
+
+# Port rows inserted per cache write transaction
+CACHE_BATCH_SIZE = 10000
+
+# Path prefix of a source row whose ports are still being inserted
+PENDING_PREFIX = 'pending:'
+
+CACHE_INSERT = ('INSERT INTO ports (source_id, ip, portid, protocol, state, service, tunnel) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)')
+
+
+def resolve_query(all_ports=False, query=None):
+    """
+    Resolves the port query to apply.
+
+    Args:
+        all_ports (bool): Flag to bypass SSL check and extract all host:port combos.
+        query (dict): Mapping of record field to a list of accepted values. Overrides all_ports.
+
+    Returns:
+        dict: The query to apply; an empty query matches every port with a service.
+
+    Raises:
+        ValueError: If the query uses a field that is not in QUERY_FIELDS.
+    """
+    if query is None:
+        return {} if all_ports else SSL_WEB_QUERY
+    for field in query:
+        if field not in QUERY_FIELDS:
+            raise ValueError(f'Unknown query field: {field}')
+    return query
+
+
+def iter_port_records(host):
+    """
+    Yields one record per port with an identified service for a single nmap <host> element.
+
+    Args:
+        host (xml.etree.ElementTree.Element): A <host> element from the nmap XML.
+
+    Yields:
+        dict: Port record with the keys 'ip' and those in QUERY_FIELDS.
+    """
+    address = host.find('address')
+    if address is not None:
+        ip = address.get('addr')
+        ports = host.find('ports')
+        if ports is not None:
+            for port in ports.findall('port'):
+                service = port.find('service')
+                if service is not None:
+                    state = port.find('state')
+                    yield {
+                        'ip': ip,
+                        'portid': port.get('portid'),
+                        'protocol': port.get('protocol'),
+                        'state': state.get('state') if state is not None else None,
+                        'service': service.get('name'),
+                        'tunnel': service.get('tunnel'),
+                    }
+
+
+def port_matches(record, query):
+    """
+    Checks a port record against a query.
+
+    Args:
+        record (dict): Port record from iter_port_records.
+        query (dict): Mapping of record field to a list of accepted values.
+
+    Returns:
+        bool: True if every field in the query accepts the record's value.
+    """
+    return all(record[field] in values for field, values in query.items())
+
+
+def extract_host_ports(host, all_ports=False, query=None):
+    """
+    Yields 'host:port' for a single nmap <host> element.
+
+    Args:
+        host (xml.etree.ElementTree.Element): A <host> element from the nmap XML.
+        all_ports (bool): Flag to bypass SSL check and extract all host:port combos.
+        query (dict): Optional port query, see resolve_query.
+
+    Yields:
+        str: 'host:port' strings for the matching ports of this host.
+    """
+    query = resolve_query(all_ports, query)
+    for record in iter_port_records(host):
+        if port_matches(record, query):
+            yield f'{record["ip"]}:{record["portid"]}'
+
+
+def extract_host_port_from_nmap_xml(xml_file, all_ports=False, query=None):
     """
     Extracts 'host:port' from an nmap XML file for all webservers supporting SSL or all services if all_ports is True.
 
     Args:
         xml_file (str): Path to the input XML file.
         all_ports (bool): Flag to bypass SSL check and extract all host:port combos.
+        query (dict): Optional port query, see resolve_query.
 
     Returns:
         list: List of 'host:port' strings.
@@ -26,27 +166,363 @@ def extract_host_port_from_nmap_xml(xml_file, all_ports=False):
 
     output = []
     for host in root.findall('host'):
-        address = host.find('address')
-        if address is not None:
-            ip = address.get('addr')
-            ports = host.find('ports')
-            if ports is not None:
-                for port in ports.findall('port'):
-                    service = port.find('service')
-                    if service is not None:
-                        service_name = service.get('name')
-                        tunnel = service.get('tunnel')
-                        if all_ports or (service_name in ['http', 'https'] and tunnel == 'ssl'):
-                            output.append(f'{ip}:{port.get("portid")}')
+        output.extend(extract_host_ports(host, all_ports, query))
     return output
 
 
+def _top_level_hosts(events):
+    """
+    Yields the top-level <host> elements from a stream of ('start'/'end', element) events.
+
+    Everything parsed under the root is discarded after each top-level element
+    closes, so memory use stays flat regardless of the size of the scan.
+    """
+    depth = 0
+    root = None
+    for event, elem in events:
+        if event == 'start':
+            if root is None:
+                root = elem
+            depth += 1
+            continue
+
+        depth -= 1
+        if depth == 1:
+            # Only direct children of the root, mirroring root.findall('host')
+            if elem.tag == 'host':
+                yield elem
+            # Drop everything parsed so far under the root
+            root.clear()
+
+
+def iter_hosts(xml_file):
+    """
+    Streams the top-level <host> elements of an nmap XML file.
+
+    Each element is yielded as soon as it closes and is discarded afterwards.
+
+    Args:
+        xml_file (str): Path to the input XML file.
+
+    Yields:
+        xml.etree.ElementTree.Element: <host> elements in document order.
+    """
+    yield from _top_level_hosts(ET.iterparse(xml_file, events=('start', 'end')))
+
+
+def _follow_events(xml_file, poll_interval):
+    """
+    Tails a growing XML file and yields parser events until the root element closes.
+    """
+    while not os.path.exists(xml_file):
+        time.sleep(poll_interval)
+
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    depth = 0
+    with open(xml_file, 'rb') as f:
+        while True:
+            chunk = f.read(1 << 16)
+            if not chunk:
+                time.sleep(poll_interval)
+                continue
+            parser.feed(chunk)
+            for event, elem in parser.read_events():
+                yield event, elem
+                depth += 1 if event == 'start' else -1
+                if depth == 0:
+                    # </nmaprun> seen, the scan is complete
+                    return
+
+
+def follow_hosts(xml_file, poll_interval=1.0):
+    """
+    Streams the top-level <host> elements of an nmap XML file that is still being written.
+
+    The unclosed root element of an in-progress -oX file is tolerated; each <host>
+    is yielded as soon as its block is complete and the generator returns once
+    </nmaprun> appears. If the file does not exist yet, it is waited for.
+
+    Args:
+        xml_file (str): Path to the input XML file.
+        poll_interval (float): Seconds to wait before re-reading when no new data is available.
+
+    Yields:
+        xml.etree.ElementTree.Element: <host> elements in document order.
+    """
+    yield from _top_level_hosts(_follow_events(xml_file, poll_interval))
+
+
+def iter_host_port_from_nmap_xml(xml_file, all_ports=False, query=None):
+    """
+    Streams 'host:port' from an nmap XML file without building the whole tree.
+
+    The output matches extract_host_port_from_nmap_xml exactly.
+
+    Args:
+        xml_file (str): Path to the input XML file.
+        all_ports (bool): Flag to bypass SSL check and extract all host:port combos.
+        query (dict): Optional port query, see resolve_query.
+
+    Yields:
+        str: 'host:port' strings in document order.
+    """
+    for host in iter_hosts(xml_file):
+        yield from extract_host_ports(host, all_ports, query)
+
+
+def follow_host_port_from_nmap_xml(xml_file, all_ports=False, query=None, poll_interval=1.0):
+    """
+    Streams 'host:port' from an nmap XML file that is still being written.
+
+    Args:
+        xml_file (str): Path to the input XML file.
+        all_ports (bool): Flag to bypass SSL check and extract all host:port combos.
+        query (dict): Optional port query, see resolve_query.
+        poll_interval (float): Seconds to wait before re-reading when no new data is available.
+
+    Yields:
+        str: 'host:port' strings as soon as each host's block is complete.
+    """
+    for host in follow_hosts(xml_file, poll_interval):
+        yield from extract_host_ports(host, all_ports, query)
+
+
+def open_cache(cache_path):
+    """
+    Opens (and if needed creates) the SQLite scan cache.
+
+    Args:
+        cache_path (str): Path to the SQLite database.
+
+    Returns:
+        sqlite3.Connection: Open connection to the cache.
+    """
+    cache_dir = os.path.dirname(cache_path)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    conn = sqlite3.connect(cache_path, timeout=60)
+    conn.executescript(CACHE_SCHEMA)
+    return conn
+
+
+def file_sha256(path):
+    """
+    Computes the SHA-256 of a file in fixed-size chunks.
+
+    Args:
+        path (str): Path to the file.
+
+    Returns:
+        str: Hex digest of the file contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def compile_to_cache(conn, xml_file, source_id=None):
+    """
+    Compiles an nmap XML file into the cache, replacing any previous copy.
+
+    The file is parsed outside any transaction. Its ports are inserted in short
+    transactions of CACHE_BATCH_SIZE rows under a pending source row, which a final
+    short transaction swaps in for the previous copy, so parallel compiles only hold
+    the write lock while inserting.
+
+    Args:
+        conn (sqlite3.Connection): Open cache connection.
+        xml_file (str): Path to the input XML file.
+        source_id (int): Existing source row to replace, if any.
+
+    Returns:
+        int: The source id of the compiled file.
+    """
+    stat = os.stat(xml_file)
+    sha256 = file_sha256(xml_file)
+    path = os.path.abspath(xml_file)
+    pending_path = f'{PENDING_PREFIX}{os.getpid()}:{path}'
+    with conn:
+        # Drop what an interrupted compile of this file left behind
+        conn.execute('DELETE FROM ports WHERE source_id IN (SELECT id FROM sources WHERE path = ?)',
+                     (pending_path,))
+        conn.execute('DELETE FROM sources WHERE path = ?', (pending_path,))
+        pending_id = conn.execute(
+            'INSERT INTO sources (path, size, mtime, sha256) VALUES (?, -1, 0, ?)',
+            (pending_path, sha256)).lastrowid
+
+    batch = []
+    try:
+        for host in iter_hosts(xml_file):
+            for record in iter_port_records(host):
+                batch.append((pending_id, record['ip'], *(record[field] for field in QUERY_FIELDS)))
+            if len(batch) >= CACHE_BATCH_SIZE:
+                with conn:
+                    conn.executemany(CACHE_INSERT, batch)
+                batch = []
+    except BaseException:
+        with conn:
+            conn.execute('DELETE FROM ports WHERE source_id = ?', (pending_id,))
+            conn.execute('DELETE FROM sources WHERE id = ?', (pending_id,))
+        raise
+
+    with conn:
+        conn.executemany(CACHE_INSERT, batch)
+        if source_id is not None:
+            conn.execute('DELETE FROM ports WHERE source_id = ?', (source_id,))
+            conn.execute('DELETE FROM sources WHERE id = ?', (source_id,))
+        conn.execute('UPDATE sources SET path = ?, size = ?, mtime = ? WHERE id = ?',
+                     (path, stat.st_size, stat.st_mtime, pending_id))
+    return pending_id
+
+
+def cached_source_id(conn, xml_file):
+    """
+    Returns the cache source id for an XML file, compiling it if missing or stale.
+
+    A file is current if its size and mtime match the cached copy, or if only the
+    mtime moved but the content hash is unchanged.
+
+    Args:
+        conn (sqlite3.Connection): Open cache connection.
+        xml_file (str): Path to the input XML file.
+
+    Returns:
+        int: The source id of the file in the cache.
+    """
+    row = conn.execute('SELECT id, size, mtime, sha256 FROM sources WHERE path = ?',
+                       (os.path.abspath(xml_file),)).fetchone()
+    if row is None:
+        return compile_to_cache(conn, xml_file)
+
+    source_id, size, mtime, sha256 = row
+    stat = os.stat(xml_file)
+    if stat.st_size == size and stat.st_mtime == mtime:
+        return source_id
+    if stat.st_size == size and file_sha256(xml_file) == sha256:
+        with conn:
+            conn.execute('UPDATE sources SET mtime = ? WHERE id = ?', (stat.st_mtime, source_id))
+        return source_id
+    return compile_to_cache(conn, xml_file, source_id)
+
+
+def cached_host_port_from_nmap_xml(xml_file, all_ports=False, query=None, cache_path=DEFAULT_CACHE):
+    """
+    Extracts 'host:port' from an nmap XML file through the on-disk scan cache.
+
+    The file is parsed once into an indexed SQLite store; later calls answer the
+    query from the indexes. The output matches extract_host_port_from_nmap_xml exactly.
+
+    Args:
+        xml_file (str): Path to the input XML file.
+        all_ports (bool): Flag to bypass SSL check and extract all host:port combos.
+        query (dict): Optional port query, see resolve_query.
+        cache_path (str): Path to the SQLite database.
+
+    Returns:
+        list: List of 'host:port' strings.
+    """
+    query = resolve_query(all_ports, query)
+    conn = open_cache(cache_path)
+    try:
+        source_id = cached_source_id(conn, xml_file)
+        sql = 'SELECT ip, portid FROM ports WHERE source_id = ?'
+        params = [source_id]
+        for field, values in query.items():
+            sql += f' AND {field} IN ({", ".join("?" * len(values))})'
+            params.extend(values)
+        sql += ' ORDER BY seq'
+        return [f'{ip}:{portid}' for ip, portid in conn.execute(sql, params)]
+    finally:
+        conn.close()
+
+
+def expand_inputs(inputs):
+    """
+    Expands input arguments into a sorted list of XML files.
+
+    Args:
+        inputs (list): File paths, directories (searched for *.xml) or glob patterns.
+
+    Returns:
+        list: Sorted, de-duplicated list of XML file paths.
+    """
+    files = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            files.update(glob.glob(os.path.join(item, '*.xml')))
+        elif os.path.isfile(item):
+            files.add(item)
+        else:
+            files.update(path for path in glob.glob(item) if os.path.isfile(path))
+    return sorted(files)
+
+
+def host_port_sort_key(host_port):
+    """
+    Sort key ordering 'host:port' strings by numeric IP address and then port.
+
+    Args:
+        host_port (str): A 'host:port' string.
+
+    Returns:
+        tuple: Key usable with sorted().
+    """
+    host, _, port = host_port.rpartition(':')
+    try:
+        ip = ipaddress.ip_address(host)
+        host_key = (ip.version, int(ip), '')
+    except ValueError:
+        host_key = (99, 0, host)
+    return host_key, int(port) if port.isdigit() else 0, port
+
+
+def _extract_file_set(job):
+    """
+    Process pool worker: parses one XML file and returns its 'host:port' set.
+    """
+    xml_file, all_ports, query, cache_path = job
+    if cache_path is not None:
+        return set(cached_host_port_from_nmap_xml(xml_file, all_ports, query, cache_path))
+    return set(iter_host_port_from_nmap_xml(xml_file, all_ports, query))
+
+
+def extract_host_port_from_nmap_xml_files(xml_files, all_ports=False, jobs=None, query=None, cache_path=None):
+    """
+    Extracts 'host:port' from many nmap XML files in parallel and merges the results.
+
+    The merged output is deduplicated and sorted by numeric IP and port, so it does
+    not depend on the number of workers or the order in which files finish.
+
+    Args:
+        xml_files (list): Paths to the input XML files.
+        all_ports (bool): Flag to bypass SSL check and extract all host:port combos.
+        jobs (int): Number of worker processes (default: number of CPUs).
+        query (dict): Optional port query, see resolve_query.
+        cache_path (str): Answer from this SQLite scan cache instead of re-parsing, if given.
+
+    Returns:
+        list: Sorted list of unique 'host:port' strings.
+    """
+    merged = set()
+    work = [(xml_file, all_ports, query, cache_path) for xml_file in xml_files]
+    if jobs == 1 or len(work) <= 1:
+        for job in work:
+            merged.update(_extract_file_set(job))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            for result in executor.map(_extract_file_set, work):
+                merged.update(result)
+    return sorted(merged, key=host_port_sort_key)
+
+
 def write_to_file(data, filename):
     """
     Writes data to a file, one line per item.
 
     Args:
-        data (list): List of strings to be written to file.
+        data (iterable): Strings to be written to file.
         filename (str): Path to the output file.
     """
     with open(filename, 'w') as f:
@@ -54,6 +530,19 @@ def write_to_file(data, filename):
             f.write(line + '\n')
 
 
+def write_to_stream(data, stream):
+    """
+    Writes data to an open stream one line per item, flushing after every line.
+
+    Args:
+        data (iterable): Strings to be written.
+        stream (io.TextIOBase): Open text stream.
+    """
+    for line in data:
+        stream.write(line + '\n')
+        stream.flush()
+
+
 def parse_arguments():
     """
     Parses command-line arguments for the script.
@@ -62,22 +551,85 @@ def parse_arguments():
         argparse.Namespace: Namespace object built from attributes parsed out of command line.
     """
     parser = argparse.ArgumentParser(description='Process nmap XML output.')
-    parser.add_argument('-i', '--input', help='Input XML file', required=True)
+    parser.add_argument('-i', '--input', help='Input XML file(s), directories or glob patterns', nargs='+',
+                        required=True)
     parser.add_argument('-o', '--output', help='Output text file (default: <input_path>/hostport.txt)', default=None)
     parser.add_argument('-a', '--all-ports', help='Extract all host:port combos (no SSL check)', action='store_true')
+    parser.add_argument('-s', '--stream', help='Parse incrementally with constant memory (for very large XML files)',
+                        action='store_true')
+    parser.add_argument('-j', '--jobs', help='Worker processes for multiple inputs (default: number of CPUs)',
+                        type=int, default=None)
+    parser.add_argument('-f', '--follow', help='Tail an XML file that is still being written; output goes to stdout '
+                        'unless -o is given', action='store_true')
+    parser.add_argument('--poll', help='Seconds between reads in follow mode (default: 1.0)', type=float, default=1.0)
+    parser.add_argument('-c', '--cache', help=f'Answer from an indexed SQLite scan cache (default: {DEFAULT_CACHE})',
+                        nargs='?', const=DEFAULT_CACHE, default=None)
+    parser.add_argument('--service', help='Only ports with these service names', nargs='+')
+    parser.add_argument('--port', help='Only these port numbers', nargs='+', dest='portid')
+    parser.add_argument('--protocol', help='Only these protocols (tcp, udp, ...)', nargs='+')
+    parser.add_argument('--state', help='Only ports in these states (open, filtered, ...)', nargs='+')
+    parser.add_argument('--tunnel', help='Only ports with these tunnels (ssl)', nargs='+')
     return parser.parse_args()
 
 
+def build_query(args):
+    """
+    Builds a port query from the filter arguments.
+
+    Args:
+        args (argparse.Namespace): Parsed command-line arguments.
+
+    Returns:
+        dict: Port query, or None if no filters were given.
+    """
+    query = {field: getattr(args, field) for field in QUERY_FIELDS if getattr(args, field)}
+    return query or None
+
+
 if __name__ == "__main__":
     args = parse_arguments()
-    result = extract_host_port_from_nmap_xml(args.input, args.all_ports)
+    query = build_query(args)
+    if query is not None:
+        suffix = '_hostport_query.txt'
+    elif args.all_ports:
+        suffix = '_hostport_all.txt'
+    else:
+        suffix = '_hostport_ssl.txt'
+
+    if args.follow:
+        if len(args.input) != 1:
+            raise SystemExit('Follow mode takes exactly one input file')
+        result = follow_host_port_from_nmap_xml(args.input[0], args.all_ports, query, args.poll)
+        if args.output is None:
+            write_to_stream(result, sys.stdout)
+        else:
+            with open(args.output, 'w') as f:
+                write_to_stream(result, f)
+        sys.exit(0)
 
-    # Set output file name based on flag
-    input_path, _ = os.path.splitext(args.input)
-    if args.all_ports:
-        output_file = input_path + '_hostport_all.txt'
+    if len(args.input) == 1 and os.path.isfile(args.input[0]):
+        input_file = args.input[0]
+        if args.cache is not None:
+            result = cached_host_port_from_nmap_xml(input_file, args.all_ports, query, args.cache)
+        elif args.stream:
+            result = iter_host_port_from_nmap_xml(input_file, args.all_ports, query)
+        else:
+            result = extract_host_port_from_nmap_xml(input_file, args.all_ports, query)
+
+        # Set output file name based on flag
+        input_path, _ = os.path.splitext(input_file)
+        output_file = input_path + suffix
     else:
-        output_file = input_path + '_hostport_ssl.txt'
+        input_files = expand_inputs(args.input)
+        if not input_files:
+            raise SystemExit(f"No XML files found for: {' '.join(args.input)}")
+        result = extract_host_port_from_nmap_xml_files(input_files, args.all_ports, args.jobs, query, args.cache)
+
+        # Merged output goes next to the inputs
+        input_dir = os.path.commonpath([os.path.abspath(path) for path in input_files])
+        if not os.path.isdir(input_dir):
+            input_dir = os.path.dirname(input_dir)
+        output_file = os.path.join(input_dir, suffix.lstrip('_'))
 
     # Use specified output file name if provided
     if args.output is not None:
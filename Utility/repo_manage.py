@@ -5,7 +5,7 @@
 
     store: Initial setup, generates a list of repositories in a specified directory.
     pull: Pulls updates for all repositories in the list that are found in the directory.
-    update: Updates local repositories if there are new commits.
+    update: Updates local repositories whose remote has new commits.
 
 Usage:
 
@@ -13,16 +13,55 @@
     python repo_manage.py pull [directory]
     python repo_manage.py update [directory]
 
+Options:
+
+    --jobs N       Number of repositories to process concurrently.
+    --depth N      How many directory levels store searches for repositories (e.g. 2 for org/repo).
+    --metrics PATH Write per-repository pull metrics (time, objects, bytes, outcome) as JSON.
+    --state PATH   State file (default repo_list.yaml). A .db/.sqlite path uses SQLite and
+                   migrates the matching .yaml file on first use.
+    --timeout SEC  Per-repository pull timeout in seconds (pull/update).
+
 """
 import os
+import re
 import git
+import glob
+import json
+import time
 import yaml
+import zlib
+import sqlite3
+import stat
+import tempfile
+import mmap
 import datetime
 import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 REPO_LIST_PATH = 'repo_list.yaml'
 DEFAULT_DIRECTORY = "~/Repos"
+DEFAULT_JOBS = 8
+DEFAULT_DEPTH = 2
+DEFAULT_TIMEOUT = 300
+SQLITE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+HISTORY_LENGTH = 20
+REPORT_SIZE = 10
+
+# git reports received data as e.g. "1.23 MiB | 2.00 MiB/s"
+RECEIVED_BYTES_REGEX = re.compile(r'([\d.]+) (bytes|KiB|MiB|GiB)')
+BYTE_UNITS = {'bytes': 1, 'KiB': 1 << 10, 'MiB': 1 << 20, 'GiB': 1 << 30}
+
+# Pack index (version 2) layout and pack object types
+PACK_INDEX_MAGIC = b'\377tOc'
+PACK_OBJECT_TYPES = {1: 'commit', 2: 'tree', 3: 'blob', 4: 'tag'}
+OFS_DELTA = 6
+REF_DELTA = 7
+
+# Prefer the libyaml-backed loader/dumper when PyYAML was built with it
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+YamlDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
 
 def get_repo(directory: str, repo_name: str) -> git.Repo:
     """
@@ -37,111 +76,623 @@ def get_repo(directory: str, repo_name: str) -> git.Repo:
             print(f"Warning: {repo_dir} is not a valid git repository.")
     return None
 
-def store(directory: str) -> None:
+def discover_repos(directory: str, max_depth: int = DEFAULT_DEPTH) -> list:
+    """
+    Walks the directory tree with os.scandir down to max_depth levels and returns the
+    paths (relative to directory) of every git repository found, e.g. 'org/repo'.
+    The walk does not descend into .git directories or into repositories themselves.
+    """
+    found = []
+    pending = [('', 1)]
+    while pending:
+        relative, depth = pending.pop()
+        try:
+            entries = list(os.scandir(os.path.join(directory, relative)))
+        except OSError as e:
+            print(f"Warning: Cannot read {os.path.join(directory, relative)}. Error: {e}")
+            continue
+
+        for entry in entries:
+            if entry.name == '.git' or not entry.is_dir():
+                continue
+            name = os.path.join(relative, entry.name)
+            if os.path.exists(os.path.join(entry.path, '.git')):
+                found.append(name)
+            elif depth < max_depth:
+                pending.append((name, depth + 1))
+    return sorted(found)
+
+
+def _resolve_git_dir(repo_dir: str) -> str:
+    """
+    Returns the git directory of a working tree, following 'gitdir:' files.
+    """
+    git_dir = os.path.join(repo_dir, '.git')
+    if os.path.isfile(git_dir):
+        with open(git_dir, 'r') as file:
+            content = file.read().strip()
+        if not content.startswith('gitdir:'):
+            raise ValueError(f"Unrecognised .git file in {repo_dir}")
+        git_dir = os.path.join(repo_dir, content[len('gitdir:'):].strip())
+    return git_dir
+
+
+def _read_ref(git_dir: str, ref: str) -> str:
+    """
+    Resolves a ref to a SHA from the loose ref files or packed-refs.
+    """
+    ref_path = os.path.join(git_dir, ref)
+    if os.path.isfile(ref_path):
+        with open(ref_path, 'r') as file:
+            return file.read().strip()
+
+    with open(os.path.join(git_dir, 'packed-refs'), 'r') as file:
+        for line in file:
+            if line.startswith(('#', '^')):
+                continue
+            sha, _, name = line.strip().partition(' ')
+            if name == ref:
+                return sha
+    raise ValueError(f"Ref {ref} not found in {git_dir}")
+
+
+def _read_varint(data: bytes, pos: int) -> tuple:
+    """
+    Reads a little-endian base-128 size as used in pack delta headers.
+    Returns (value, next position).
+    """
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, pos
+
+
+def _apply_delta(base: bytes, delta: bytes) -> bytes:
+    """
+    Rebuilds an object from its delta base and a pack delta (copy/insert instructions).
+    """
+    _, pos = _read_varint(delta, 0)
+    target_size, pos = _read_varint(delta, pos)
+    result = bytearray()
+    while pos < len(delta):
+        opcode = delta[pos]
+        pos += 1
+        if opcode & 0x80:
+            offset = size = 0
+            for bit in range(4):
+                if opcode & (1 << bit):
+                    offset |= delta[pos] << (8 * bit)
+                    pos += 1
+            for bit in range(3):
+                if opcode & (1 << (4 + bit)):
+                    size |= delta[pos] << (8 * bit)
+                    pos += 1
+            result += base[offset:offset + (size or 0x10000)]
+        elif opcode:
+            result += delta[pos:pos + opcode]
+            pos += opcode
+        else:
+            raise ValueError("Invalid delta instruction")
+    if len(result) != target_size:
+        raise ValueError("Delta result has the wrong size")
+    return bytes(result)
+
+
+def _find_packed_object(git_dir: str, sha: str) -> tuple:
+    """
+    Looks a SHA up in the version 2 pack indexes of a repository.
+    Returns (pack path, offset), or None if no pack contains the object.
+    """
+    raw_sha = bytes.fromhex(sha)
+    for index_path in glob.glob(os.path.join(git_dir, 'objects', 'pack', 'pack-*.idx')):
+        with open(index_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as index:
+            location = _search_pack_index(index, index_path, raw_sha)
+        if location is not None:
+            return location
+    return None
+
+
+def _search_pack_index(index, index_path: str, raw_sha: bytes) -> tuple:
+    """
+    Binary searches one memory-mapped version 2 pack index for a raw SHA.
+    Returns (pack path, offset), or None if the pack does not contain the object.
+    """
+    if index[:4] != PACK_INDEX_MAGIC or int.from_bytes(index[4:8], 'big') != 2:
+        raise ValueError(f"Unsupported pack index {index_path}")
+    fanout = 8
+    names = fanout + 256 * 4
+    count = int.from_bytes(index[names - 4:names], 'big')
+    first = raw_sha[0]
+    low = int.from_bytes(index[fanout + 4 * (first - 1):fanout + 4 * first], 'big') if first else 0
+    high = int.from_bytes(index[fanout + 4 * first:fanout + 4 * (first + 1)], 'big')
+    while low < high:
+        middle = (low + high) // 2
+        candidate = index[names + 20 * middle:names + 20 * (middle + 1)]
+        if candidate < raw_sha:
+            low = middle + 1
+        elif candidate > raw_sha:
+            high = middle
+        else:
+            offsets = names + 24 * count
+            offset = int.from_bytes(index[offsets + 4 * middle:offsets + 4 * (middle + 1)], 'big')
+            if offset & 0x80000000:
+                large = offsets + 4 * count + 8 * (offset & 0x7fffffff)
+                offset = int.from_bytes(index[large:large + 8], 'big')
+            return index_path[:-len('.idx')] + '.pack', offset
+    return None
+
+
+def _read_pack_object(git_dir: str, pack_path: str, offset: int) -> tuple:
+    """
+    Reads one object from a pack file, resolving offset and ref deltas.
+    Returns (type name, data).
+    """
+    with open(pack_path, 'rb') as file:
+        file.seek(offset)
+        header = file.read(32)
+        byte = header[0]
+        kind, size, shift, pos = (byte >> 4) & 7, byte & 0x0f, 4, 1
+        while byte & 0x80:
+            byte = header[pos]
+            pos += 1
+            size |= (byte & 0x7f) << shift
+            shift += 7
+        base = None
+        if kind == OFS_DELTA:
+            byte = header[pos]
+            pos += 1
+            distance = byte & 0x7f
+            while byte & 0x80:
+                byte = header[pos]
+                pos += 1
+                distance = ((distance + 1) << 7) | (byte & 0x7f)
+            base = _read_pack_object(git_dir, pack_path, offset - distance)
+        elif kind == REF_DELTA:
+            base = _read_object(git_dir, header[pos:pos + 20].hex())
+            pos += 20
+
+        file.seek(offset + pos)
+        decompressor = zlib.decompressobj()
+        data = b''
+        while not decompressor.eof:
+            chunk = file.read(1 << 16)
+            if not chunk:
+                raise ValueError(f"Truncated object in {pack_path}")
+            data += decompressor.decompress(chunk)
+
+    if base is not None:
+        return base[0], _apply_delta(base[1], data)
+    if kind not in PACK_OBJECT_TYPES:
+        raise ValueError(f"Unsupported object type {kind} in {pack_path}")
+    return PACK_OBJECT_TYPES[kind], data
+
+
+def _read_object(git_dir: str, sha: str) -> tuple:
+    """
+    Reads an object from the loose object store or the pack files.
+    Returns (type name, data).
+    """
+    try:
+        with open(os.path.join(git_dir, 'objects', sha[:2], sha[2:]), 'rb') as file:
+            data = zlib.decompress(file.read())
+    except FileNotFoundError:
+        location = _find_packed_object(git_dir, sha)
+        if location is None:
+            raise ValueError(f"Object {sha} not found in {git_dir}")
+        return _read_pack_object(git_dir, *location)
+    header, _, body = data.partition(b'\0')
+    return header.split(b' ', 1)[0].decode(), body
+
+
+def _read_head_commit_date(repo_dir: str) -> int:
+    """
+    Reads the committed date of HEAD straight from the .git directory, from a loose
+    object or a pack file. Anything unsupported (e.g. alternates) raises.
+    """
+    git_dir = _resolve_git_dir(repo_dir)
+    with open(os.path.join(git_dir, 'HEAD'), 'r') as file:
+        head = file.read().strip()
+    sha = _read_ref(git_dir, head[len('ref:'):].strip()) if head.startswith('ref:') else head
+
+    kind, body = _read_object(git_dir, sha)
+    if kind != 'commit':
+        raise ValueError(f"HEAD of {repo_dir} is not a commit")
+    for line in body.split(b'\n'):
+        if line.startswith(b'committer '):
+            return int(line.rsplit(b' ', 2)[1])
+        if not line:
+            break
+    raise ValueError(f"No committer in HEAD commit of {repo_dir}")
+
+
+def head_commit_date(repo_dir: str) -> int:
+    """
+    Returns the committed date of HEAD for a repository, reading the .git directory
+    directly and falling back to GitPython (e.g. for alternates or SHA-256 repositories).
+    Returns None if the repository is not valid.
+    """
+    try:
+        return _read_head_commit_date(repo_dir)
+    except (OSError, ValueError, IndexError, zlib.error):
+        pass
+    try:
+        return git.Repo(repo_dir).head.commit.committed_date
+    except (git.InvalidGitRepositoryError, git.NoSuchPathError, ValueError):
+        return None
+
+
+def store(directory: str, max_depth: int = DEFAULT_DEPTH, jobs: int = DEFAULT_JOBS) -> None:
     """
     Initializes or updates the list of repositories in the specified directory.
+    Repositories are discovered recursively down to max_depth and their metadata is
+    read across a thread pool.
     New repositories are added to repos.yaml, existing entries are updated.
     """
     repos = load_repos()
     for repo_info in repos.values():
         repo_info['in_directory'] = False
 
-    for subdir in os.listdir(directory):
-        repo = get_repo(directory, subdir)
-        if repo:
-            if subdir not in repos:
-                repos[subdir] = {
+    names = discover_repos(directory, max_depth)
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        dates = executor.map(lambda name: head_commit_date(os.path.join(directory, name)), names)
+
+        for name, committed_date in zip(names, dates):
+            if committed_date is None:
+                print(f"Warning: {os.path.join(directory, name)} is not a valid git repository.")
+                continue
+
+            if name not in repos:
+                repos[name] = {
                     'last_pulled': None,
                     'last_updated': None,
+                    'remote_sha': None,
                     'in_directory': True
                 }
             else:
-                repos[subdir]['in_directory'] = True
+                repos[name]['in_directory'] = True
 
-            repos[subdir]['last_updated'] = repo.head.commit.committed_date
+            repos[name]['last_updated'] = committed_date
 
     save_repos(repos)
 
 
-def update(directory: str) -> None:
+def update(directory: str, jobs: int = DEFAULT_JOBS, timeout: float = DEFAULT_TIMEOUT,
+           metrics_path: str = None) -> None:
     """
     Updates repositories if there are new commits.
-    Only updates repositories found in the directory.
+    Only updates repositories found in the directory whose remote head has moved,
+    as reported by a concurrent ls-remote pre-check.
     """
     repos = load_repos()
-    updated = False
+    candidates = {}
 
     for repo_name, repo_info in repos.items():
         repo = get_repo(directory, repo_name)
         if repo and repo_info['in_directory']:
-            if repo_info['last_pulled'] is None or repo_info['last_updated'] > repo_info['last_pulled']:
-                pull_repo(repo_name, repo, repos)
-                updated = True
+            candidates[repo_name] = repo
+
+    targets = check_remotes(candidates, repos, jobs, timeout)
+    if targets:
+        results = pull_repos(targets, repos, jobs, timeout)
+        report_pulls(results, repos, metrics_path)
+    save_repos(repos)
+
+
+def check_remotes(candidates: dict, repos: dict, jobs: int = DEFAULT_JOBS,
+                  timeout: float = DEFAULT_TIMEOUT) -> dict:
+    """
+    Queries the remote head of every candidate repository concurrently and returns
+    the ones whose remote moved since the last seen remote SHA or differs from the
+    local tracking ref. Repositories that have never been pulled are always returned.
+    Repositories without an upstream branch (or with a detached HEAD) cannot be
+    pulled, so they are skipped and listed.
+    """
+    targets = {}
+    failed = []
+    no_upstream = []
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(remote_head, repo, timeout): repo_name for repo_name, repo in candidates.items()}
+        for future in as_completed(futures):
+            repo_name = futures[future]
+            repo_info = repos[repo_name]
+            try:
+                heads = future.result()
+            except Exception as e:
+                print(f"Warning: Failed to query remote for {repo_name}. Error: {str(e).strip()}")
+                failed.append(repo_name)
+                continue
+            if heads is None:
+                no_upstream.append(repo_name)
+                continue
+
+            sha, local_sha = heads
+            if repo_info['last_pulled'] is None or sha != repo_info.get('remote_sha') or sha != local_sha:
+                targets[repo_name] = candidates[repo_name]
+
+    print(f"{len(targets)} of {len(candidates)} repositories changed upstream.")
+    if failed:
+        print(f"Remote check failed: {', '.join(sorted(failed))}")
+    if no_upstream:
+        print(f"Skipped, no upstream branch: {', '.join(sorted(no_upstream))}")
+    return targets
 
-    if updated:
-        save_repos(repos)
+
+def remote_head(repo: git.Repo, timeout: float = DEFAULT_TIMEOUT) -> tuple:
+    """
+    Returns (remote_sha, local_sha) for the branch the repository tracks.
+    remote_sha comes from ls-remote; local_sha is the local tracking ref, the same
+    ref pull_repo records after a pull.
+    Returns None if there is no tracking branch, since such a repository cannot be pulled.
+    """
+    tracking = None if repo.head.is_detached else repo.active_branch.tracking_branch()
+    if tracking is None:
+        return None
+
+    ref = f'refs/heads/{tracking.remote_head}'
+    output = repo.git.ls_remote(tracking.remote_name, ref, kill_after_timeout=timeout)
+    local_sha = tracking.commit.hexsha
+    sha = output.split()[0] if output else None
+    return sha, local_sha
 
 
-def pull(directory: str) -> None:
+def pull(directory: str, jobs: int = DEFAULT_JOBS, timeout: float = DEFAULT_TIMEOUT,
+         metrics_path: str = None) -> None:
     """
     Pulls all repositories found in the directory.
     """
     repos = load_repos()
+    targets = {}
 
     for repo_name, repo_info in repos.items():
         repo = get_repo(directory, repo_name)
         if repo and repo_info['in_directory']:
-            pull_repo(repo_name, repo, repos)
+            targets[repo_name] = repo
 
+    results = pull_repos(targets, repos, jobs, timeout)
+    report_pulls(results, repos, metrics_path)
     save_repos(repos)
 
 
-def pull_repo(repo_name: str, repo: git.Repo, repos: dict) -> None:
+def pull_repos(targets: dict, repos: dict, jobs: int = DEFAULT_JOBS, timeout: float = DEFAULT_TIMEOUT) -> list:
     """
-    Pulls a specific repository and updates the last_pulled time.
+    Pulls the given repositories concurrently and records the results in repos.
+    Pulls run on a bounded thread pool; results are printed and applied from the
+    calling thread as they complete, so output does not interleave.
+    Each result is also appended to the repository's metrics history.
+    Returns the list of pull results.
     """
-    print(f'Pulling repo: {repo_name}')
+    results = []
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(pull_repo, repo_name, repo, timeout) for repo_name, repo in targets.items()]
+        for future in as_completed(futures):
+            result = future.result()
+            repo_info = repos[result['name']]
+            if result['error'] is None:
+                print(f"Pulled repo: {result['name']} ({result['seconds']:.1f}s)")
+                repo_info['last_pulled'] = result['pulled_at']
+                repo_info['remote_sha'] = result['remote_sha']
+            else:
+                print(f"Warning: Failed to pull {result['name']}. Error: {result['error']}")
+
+            history = repo_info.get('history') or []
+            history.append({key: result[key] for key in ('started_at', 'seconds', 'objects', 'bytes', 'outcome')})
+            repo_info['history'] = history[-HISTORY_LENGTH:]
+            save_repo(result['name'], repo_info)
+            results.append(result)
+    return results
+
+
+def report_pulls(results: list, repos: dict, metrics_path: str = None, top: int = REPORT_SIZE) -> None:
+    """
+    Prints a summary table of the slowest and failing pulls, with each repository's
+    average pull time over its stored history, and optionally writes all results
+    to metrics_path as JSON.
+    """
+    failed = [result for result in results if result['error'] is not None]
+    print(f"Pulled {len(results) - len(failed)} of {len(results)} repositories.")
+
+    rows = sorted(results, key=lambda result: result['seconds'], reverse=True)[:top]
+    rows += [result for result in failed if result not in rows]
+    if rows:
+        width = max(len('Repository'), *(len(result['name']) for result in rows))
+        print(f"\n{'Repository':<{width}}  {'Time':>8}  {'Avg':>8}  {'Objects':>8}  {'Bytes':>10}  Outcome")
+        for result in rows:
+            history = repos[result['name']].get('history') or []
+            average = sum(entry['seconds'] for entry in history) / len(history) if history else result['seconds']
+            objects = '-' if result['objects'] is None else result['objects']
+            received = '-' if result['bytes'] is None else result['bytes']
+            print(f"{result['name']:<{width}}  {result['seconds']:>7.1f}s  {average:>7.1f}s  "
+                  f"{objects:>8}  {received:>10}  {result['outcome']}")
+
+    if metrics_path:
+        with open(metrics_path, 'w') as file:
+            json.dump(sorted(results, key=lambda result: result['name']), file, indent=2)
+        print(f"Metrics written to {metrics_path}")
+
+
+class PullProgress(git.RemoteProgress):
+    """
+    Records the number of objects and bytes received during a fetch.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.objects = None
+        self.bytes = None
+
+    def update(self, op_code, cur_count, max_count=None, message=''):
+        if op_code & self.RECEIVING:
+            self.objects = int(max_count or cur_count)
+            match = RECEIVED_BYTES_REGEX.search(message or '')
+            if match:
+                self.bytes = int(float(match.group(1)) * BYTE_UNITS[match.group(2)])
+
+
+def pull_repo(repo_name: str, repo: git.Repo, timeout: float = DEFAULT_TIMEOUT) -> dict:
+    """
+    Pulls a specific repository and returns the outcome, including the SHA of the
+    tracking ref afterwards, the wall time and the objects and bytes received where
+    git reports them. The pull is killed if it takes longer than timeout seconds.
+    """
+    result = {'name': repo_name, 'pulled_at': None, 'remote_sha': None, 'error': None,
+              'started_at': datetime.datetime.now().timestamp(), 'seconds': None,
+              'objects': None, 'bytes': None, 'outcome': 'pulled'}
+    progress = PullProgress()
+    start = time.monotonic()
     try:
-        repo.remotes.origin.pull()
-        repos[repo_name]['last_pulled'] = datetime.datetime.now().timestamp()
+        repo.remotes.origin.pull(progress=progress, kill_after_timeout=timeout)
+        result['pulled_at'] = datetime.datetime.now().timestamp()
+        tracking = None if repo.head.is_detached else repo.active_branch.tracking_branch()
+        if tracking is not None:
+            result['remote_sha'] = tracking.commit.hexsha
     except Exception as e:
-        print(f"Warning: Failed to pull {repo_name}. Error: {e}")
+        result['error'] = str(e).strip() or type(e).__name__
+        result['outcome'] = 'failed'
+    result['seconds'] = round(time.monotonic() - start, 3)
+    result['objects'] = progress.objects
+    result['bytes'] = progress.bytes
+    return result
 
 
-def load_repos():
+class YamlState:
     """
-    Loads the list of repositories from repos.yaml.
-    If the file does not exist, returns an empty dictionary.
+    Stores the repository list in a YAML file.
+    Uses the C-accelerated YAML loader/dumper when available and writes through a
+    temporary file and atomic rename, so an interrupted run never leaves a partial file.
     """
-    if not os.path.exists(REPO_LIST_PATH):
-        return {}
 
-    with open(REPO_LIST_PATH, 'r') as file:
-        return yaml.safe_load(file)
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> dict:
+        if not os.path.exists(self.path):
+            return {}
+
+        with open(self.path, 'r') as file:
+            return yaml.load(file, Loader=YamlLoader) or {}
+
+    def save(self, repos: dict) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.repo_list.', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as file:
+                yaml.dump(repos, file, Dumper=YamlDumper, default_flow_style=False)
+                file.flush()
+                os.fsync(file.fileno())
+            os.chmod(tmp_path, self._file_mode())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _file_mode(self) -> int:
+        # mkstemp creates 0600 files; keep the existing file's mode, or use the
+        # default for a new file (0666 minus the umask)
+        try:
+            return stat.S_IMODE(os.stat(self.path).st_mode)
+        except FileNotFoundError:
+            umask = os.umask(0)
+            os.umask(umask)
+            return 0o666 & ~umask
+
+    def save_repo(self, repo_name: str, repo_info: dict) -> None:
+        # The whole file is rewritten once by save()
+        pass
+
+
+class SqliteState:
+    """
+    Stores the repository list in a SQLite database, one row per repository.
+    Single rows are updated as each repository finishes. If the database is empty
+    and a YAML list with the same name exists, it is migrated on first load.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS repos (name TEXT PRIMARY KEY, info TEXT NOT NULL)')
+
+    def load(self) -> dict:
+        rows = self.conn.execute('SELECT name, info FROM repos').fetchall()
+        if not rows:
+            yaml_path = os.path.splitext(self.path)[0] + '.yaml'
+            if os.path.exists(yaml_path):
+                print(f"Migrating {yaml_path} to {self.path}")
+                repos = YamlState(yaml_path).load()
+                self.save(repos)
+                return repos
+        return {name: json.loads(info) for name, info in rows}
+
+    def save(self, repos: dict) -> None:
+        with self.conn:
+            self.conn.execute('DELETE FROM repos')
+            self.conn.executemany('INSERT INTO repos (name, info) VALUES (?, ?)',
+                                  [(name, json.dumps(info)) for name, info in repos.items()])
+
+    def save_repo(self, repo_name: str, repo_info: dict) -> None:
+        with self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO repos (name, info) VALUES (?, ?)',
+                              (repo_name, json.dumps(repo_info)))
+
+
+def open_state(path: str):
+    """
+    Returns the state backend for path: SQLite for .db/.sqlite files, YAML otherwise.
+    """
+    if path.endswith(SQLITE_EXTENSIONS):
+        return SqliteState(path)
+    return YamlState(path)
+
+
+def load_repos():
+    """
+    Loads the list of repositories from the state backend.
+    If the state does not exist yet, returns an empty dictionary.
+    """
+    return STATE.load()
 
 
 def save_repos(repos):
     """
-    Saves the list of repositories to repos.yaml.
+    Saves the list of repositories to the state backend.
+    """
+    STATE.save(repos)
+
+
+def save_repo(repo_name: str, repo_info: dict) -> None:
     """
-    with open(REPO_LIST_PATH, 'w') as file:
-        yaml.safe_dump(repos, file)
+    Records a single repository as soon as it finishes (a no-op for YAML state).
+    """
+    STATE.save_repo(repo_name, repo_info)
+
+
+STATE = YamlState(REPO_LIST_PATH)
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Manage Git repositories')
     parser.add_argument('command', choices=['store', 'pull', 'update'], help='The command to execute')
     parser.add_argument('directory', nargs='?', default=DEFAULT_DIRECTORY, help='The directory containing the repositories')
+    parser.add_argument('-j', '--jobs', type=int, default=DEFAULT_JOBS, help='Number of repositories to process concurrently')
+    parser.add_argument('-d', '--depth', type=int, default=DEFAULT_DEPTH, help='Directory levels searched for repositories by store')
+    parser.add_argument('-t', '--timeout', type=float, default=DEFAULT_TIMEOUT, help='Per-repository pull timeout in seconds')
+    parser.add_argument('-m', '--metrics', default=None, help='Write per-repository pull metrics to this JSON file')
+    parser.add_argument('-s', '--state', default=REPO_LIST_PATH, help='State file; .db/.sqlite uses the SQLite backend')
     args = parser.parse_args()
 
+    STATE = open_state(args.state)
     directory = os.path.expanduser(args.directory)  # Converts '~/Repos' to '/home/user/Repos'
 
     commands = {
-        'store': store,
-        'pull': pull,
-        'update': update
+        'store': lambda: store(directory, args.depth, args.jobs),
+        'pull': lambda: pull(directory, args.jobs, args.timeout, args.metrics),
+        'update': lambda: update(directory, args.jobs, args.timeout, args.metrics)
     }
 
     # Execute the selected command
     command_function = commands.get(args.command)
-    command_function(directory)
\ No newline at end of file
+    command_function()
\ No newline at end of file
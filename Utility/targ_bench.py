@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+"""
+Script Name: targ_bench.py
+
+Benchmarks the targ_sort.py classifier on synthetic target lists.
+
+Generates a temporary file with a realistic mix of IPv4/IPv6 addresses, CIDR and
+dash ranges, ASCII and IDN domains and invalid records, then reports lines per
+second for the original whole-file classifier ("before") and the current streaming
+classifier in targ_sort.py ("after"), and how many records the two classify differently
+(the current rules from targ_validate.py are stricter than the original regexes).
+It also reports the raw throughput of targ_validate.classify_lines on the same lines.
+
+Usage:
+    python targ_bench.py [--lines N] [--seed S]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import targ_sort  # pylint: disable=wrong-import-position
+from targ_validate import classify_lines, classify_value, punycode_domain  # pylint: disable=wrong-import-position
+
+LEGACY_IP_RANGE_REGEX = r"\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}(?:-\d{1,3}(?:\.\d{1,3}){0,3}|\b\/\d{1,2}\b)"
+LEGACY_IP_REGEX = r"\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b"
+LEGACY_IPV6_REGEX = r"\b(?:[A-Fa-f0-9]{1,4}:){7}[A-Fa-f0-9]{1,4}\b"
+
+
+def legacy_extract_data(file_name):
+    """
+    The original targ_sort.extract_data, kept as the benchmark baseline.
+
+    Arguments:
+        file_name (str): Path to the input file.
+
+    Returns:
+        tuple: A tuple containing three sets: IP addresses, URLs, and CIDR ranges.
+    """
+    def punycode_domain(domain):
+        return ".".join([part.encode("idna").decode("ascii") for part in domain.split(".")])
+
+    def is_valid_domain(domain):
+        if len(domain) > 253:
+            return False
+        domain_parts = domain.split(".")
+        if any(len(part) > 63 for part in domain_parts):
+            return False
+        valid_label = re.compile(r"^(?!-)[A-Za-z0-9-]{1,63}(?<!-)$")
+        return all(valid_label.match(part) for part in domain_parts)
+
+    with open(file_name, encoding='utf-8') as targ_file:
+        contents = targ_file.read()
+    contents = "\n".join([punycode_domain(line.strip()) for line in contents.splitlines()])
+
+    lines = contents.split("\n")
+    file_ip_addresses = set()
+    file_cidr_ranges = set()
+    file_urls = set()
+
+    for index, line in enumerate(lines, start=1):
+        if re.match(LEGACY_IP_RANGE_REGEX, line):
+            file_cidr_ranges.add(line)
+        elif re.match(LEGACY_IP_REGEX, line) or re.match(LEGACY_IPV6_REGEX, line):
+            file_ip_addresses.add(line)
+        elif is_valid_domain(line):
+            file_urls.add(line)
+        else:
+            print(f"Invalid record found in {file_name} at line {index}: {line}")
+
+    return file_ip_addresses, file_urls, file_cidr_ranges
+
+
+def synthetic_line(rng):
+    """
+    Build one synthetic target line.
+
+    Arguments:
+        rng (random.Random): Random source.
+
+    Returns:
+        str: A target line.
+    """
+    roll = rng.random()
+    octets = [rng.randint(1, 254) for _ in range(4)]
+    ip = ".".join(map(str, octets))
+    if roll < 0.45:
+        return ip
+    if roll < 0.55:
+        return f"{ip}/{rng.choice((16, 24, 28, 32))}"
+    if roll < 0.60:
+        return f"{ip}-{rng.randint(octets[3], 254)}"
+    if roll < 0.65:
+        return ":".join(f"{rng.randint(0, 0xffff):x}" for _ in range(8))
+    if roll < 0.95:
+        return f"  host{rng.randint(0, 10 ** 6)}.sub{rng.randint(0, 99)}.example{rng.randint(0, 9)}.com "
+    if roll < 0.99:
+        return f"bücher{rng.randint(0, 999)}.example.de"
+    return "not a target!"
+
+
+def write_synthetic_file(path, lines, seed):
+    """
+    Write a synthetic target list.
+
+    Arguments:
+        path (str): Output path.
+        lines (int): Number of lines to write.
+        seed (int): Random seed.
+    """
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as outfile:
+        for _ in range(lines):
+            outfile.write(synthetic_line(rng) + "\n")
+
+
+def time_classify(path):
+    """
+    Run targ_validate.classify_lines over every line of a file, starting from
+    empty classification caches.
+
+    Arguments:
+        path (str): Input file path.
+
+    Returns:
+        float: Elapsed seconds.
+    """
+    with open(path, encoding="utf-8") as targ_file:
+        lines = targ_file.readlines()
+    classify_value.cache_clear()
+    punycode_domain.cache_clear()
+    start = time.perf_counter()
+    for _ in classify_lines(lines):
+        pass
+    return time.perf_counter() - start
+
+
+def time_extract(function, path):
+    """
+    Run an extract function with its per-line output suppressed.
+
+    Arguments:
+        function (callable): extract_data implementation.
+        path (str): Input file path.
+
+    Returns:
+        tuple: (elapsed seconds, result)
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = function(path)
+        elapsed = time.perf_counter() - start
+    return elapsed, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the targ_sort.py classifier")
+    parser.add_argument("--lines", "-n", type=int, default=2_000_000, help="Number of synthetic lines")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        targ_path = os.path.join(tmp_dir, "targ-bench.txt")
+        write_synthetic_file(targ_path, args.lines, args.seed)
+
+        before, expected = time_extract(legacy_extract_data, targ_path)
+        after, actual = time_extract(targ_sort.extract_data, targ_path)
+        classify = time_classify(targ_path)
+
+    print(f"Lines:  {args.lines:,}")
+    print(f"Before: {args.lines / before:,.0f} lines/s ({before:.2f}s)")
+    print(f"After:  {args.lines / after:,.0f} lines/s ({after:.2f}s)")
+    print(f"Speedup: {before / after:.1f}x")
+    print(f"Classifier: {args.lines / classify:,.0f} lines/s ({classify:.2f}s, classify_lines only)")
+    differences = sum(len(old ^ new) for old, new in zip(expected, actual))
+    print("Output matches" if not differences else f"Records classified differently: {differences:,}")
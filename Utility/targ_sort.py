@@ -5,7 +5,8 @@
 Date: 05/04/2021
 
 Extracts IP addresses, URLs, and CIDR ranges from files matching the "targ-*" pattern
-in the current directory.
+(or the pattern given with --pattern) in the current directory. Files, and large files
+split into chunks, are classified across a process pool (--jobs).
 
 Outputs:
 - One file containing IP addresses found in each input file
@@ -17,84 +18,490 @@
 format, you may need to modify the script to use a different method for reading the file contents.
 - If any of the extracted values are empty, no output file is created for that type of value.
 - Each value is written to a separate line in the output file.
+- IP addresses and ranges are sorted numerically. With --aggregate, overlapping CIDR blocks
+and dash ranges are merged into a minimal list of CIDR blocks and IPs they cover are dropped.
+- Domains are grouped under their parent domain (example.com, *.example.com, a.example.com, ...).
+Wildcard entries are accepted, and with --collapse-wildcards subdomains they cover are dropped.
+- Per-file results are cached in ~/.cache/targ_sort/ (one file per target directory, outside the
+directory itself) so unchanged files are not reparsed on the next run. Use --no-cache to reparse
+everything.
+- Records are classified by targ_validate.py, which must sit next to this script and is shared
+with targ_verify.py.
 """
 
+import argparse
+import bisect
+import contextlib
+import glob
+import hashlib
+import io
+import ipaddress
+import json
 import os
-import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 
-IP_RANGE_REGEX = r"\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}(?:-\d{1,3}(?:\.\d{1,3}){0,3}|\b\/\d{1,2}\b)"
-IP_REGEX = r"\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b"
-IPV6_REGEX = r"\b(?:[A-Fa-f0-9]{1,4}:){7}[A-Fa-f0-9]{1,4}\b"
+from targ_validate import CIDR, CLASSIFIER_VERSION, IP, URL, classify_lines, parse_span
 
-def punycode_domain(domain):
+# Files larger than this are split into chunks processed in parallel
+CHUNK_SIZE = 32 * 1024 * 1024
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "targ_sort")
+OUTPUT_FILES = {"sorted-ip.txt", "sorted-url.txt", "sorted-cidr.txt", "sorted-all.txt"}
+
+def extract_data(file_name):
     """
-    Convert a domain to its punycode representation.
+    Extract IP addresses, URLs, and CIDR ranges from a file.
+
+    The file is streamed line by line, so memory use is bounded by the number of
+    unique records rather than the size of the file.
 
     Arguments:
-        domain (str): Domain to be converted.
+        file (str): Path to the input file.
 
     Returns:
-        str: Punycode representation of the domain.
+        tuple: A tuple containing three sets: IP addresses, URLs, and CIDR ranges.
     """
-    return ".".join([part.encode("idna").decode("ascii") for part in domain.split(".")])
+    found = {IP: set(), URL: set(), CIDR: set()}
+
+    with open(file_name, encoding='utf-8') as targ_file:
+        for index, kind, line in classify_lines(targ_file):
+            if kind is not None:
+                found[kind].add(line)
+            else:
+                print(f"Invalid record found in {file_name} at line {index}: {line}")
 
-def is_valid_domain(domain):
+    return found[IP], found[URL], found[CIDR]
+
+def split_file(file_name, chunk_size=CHUNK_SIZE):
     """
-    Check if the domain is valid.
+    Split a file into byte ranges of roughly chunk_size, aligned to line breaks.
 
     Arguments:
-        domain (str): Domain to be checked.
+        file_name (str): Path to the input file.
+        chunk_size (int): Target chunk size in bytes.
 
     Returns:
-        bool: True if the domain is valid, False otherwise.
+        list: (file_name, start, end) tuples covering the whole file in order.
     """
-    if len(domain) > 253:
-        return False
-    domain_parts = domain.split(".")
-    if any(len(part) > 63 for part in domain_parts):
-        return False
+    size = os.path.getsize(file_name)
+    chunks = []
+    start = 0
+    with open(file_name, "rb") as targ_file:
+        while start < size:
+            targ_file.seek(min(start + chunk_size, size))
+            targ_file.readline()
+            end = min(targ_file.tell(), size)
+            chunks.append((file_name, start, end))
+            start = end
+    return chunks or [(file_name, 0, 0)]
 
-    valid_label = re.compile(r"^(?!-)[A-Za-z0-9-]{1,63}(?<!-)$")
-    return all(valid_label.match(part) for part in domain_parts)
+def classify_chunk(chunk):
+    """
+    Classify one byte range of a file. Runs in a worker process.
 
-def extract_data(file_name):
+    Arguments:
+        chunk (tuple): (file_name, start, end) as returned by split_file.
+
+    Returns:
+        tuple: Sets of IP addresses, URLs and CIDR ranges, a list of (line number, line)
+        invalid records numbered from the start of the chunk, and the chunk's line count.
     """
-    Extract IP addresses, URLs, and CIDR ranges from a file.
+    file_name, start, end = chunk
+    with open(file_name, "rb") as targ_file:
+        targ_file.seek(start)
+        contents = targ_file.read(end - start).decode("utf-8")
+
+    found = {IP: set(), URL: set(), CIDR: set()}
+    invalid = []
+    line_count = 0
+    for line_count, kind, line in classify_lines(io.StringIO(contents, newline=None)):
+        if kind is not None:
+            found[kind].add(line)
+        else:
+            invalid.append((line_count, line))
+
+    return found[IP], found[URL], found[CIDR], invalid, line_count
+
+def default_cache_path(directory="."):
+    """
+    Return the cache file for a target directory.
+
+    The cache lives outside the target directory, so it is never mistaken for a
+    target file, and is keyed by the directory's absolute path.
 
     Arguments:
-        file (str): Path to the input file.
+        directory (str): Target directory.
 
     Returns:
-        tuple: A tuple containing three lists: IP addresses, URLs, and CIDR ranges.
+        str: Path of the cache file.
     """
-    with open(file_name, encoding='utf-8') as targ_file:
-        contents = targ_file.read()
-    # Normalize contents (replace non-ASCII characters, trim whitespace)
-    contents = "\n".join([punycode_domain(line.strip()) for line in contents.splitlines()])
-
-    # Split lines and initialize lists
-    lines = contents.split("\n")
-    file_ip_addresses = set()
-    file_cidr_ranges = set()
-    file_urls = set()
-
-
-
-    # Process each line
-    for index, line in enumerate(lines, start=1):
-        # Check for CIDR or IP ranges
-        if re.match(IP_RANGE_REGEX, line):
-            file_cidr_ranges.add(line)
-        # Check for IPv4 and IPv6 addresses
-        elif re.match(IP_REGEX, line) or re.match(IPV6_REGEX, line):
-            file_ip_addresses.add(line)
-        # Check for valid domains
-        elif is_valid_domain(line):
-            file_urls.add(line)
+    key = hashlib.sha256(os.path.abspath(directory).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f"{key}.json")
+
+class ResultCache:
+    """
+    On-disk cache of per-file classification results.
+
+    Entries are keyed by path and validated against the file's size, mtime and
+    SHA-256: a matching size and mtime is trusted, otherwise the content hash decides.
+    The whole cache is discarded when CLASSIFIER_VERSION in targ_validate.py changes.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_cache_path()
+        self.entries = {}
+        self.dirty = False
+        try:
+            with open(self.path, encoding="utf-8") as cache_file:
+                data = json.load(cache_file)
+            if data.get("version") == CLASSIFIER_VERSION:
+                self.entries = data["files"]
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+
+    @staticmethod
+    def file_sha256(file_name):
+        digest = hashlib.sha256()
+        with open(file_name, "rb") as targ_file:
+            for block in iter(lambda: targ_file.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def get(self, file_name):
+        """
+        Return the cached result for a file, or None if missing or stale.
+        """
+        entry = self.entries.get(os.path.abspath(file_name))
+        if entry is None:
+            return None
+        stat = os.stat(file_name)
+        if stat.st_size != entry["size"]:
+            return None
+        if stat.st_mtime_ns != entry["mtime_ns"]:
+            if self.file_sha256(file_name) != entry["sha256"]:
+                return None
+            entry["mtime_ns"] = stat.st_mtime_ns
+            self.dirty = True
+        return {"ip": set(entry["ip"]), "url": set(entry["url"]), "cidr": set(entry["cidr"]),
+                "invalid": [tuple(record) for record in entry["invalid"]], "lines": entry["lines"]}
+
+    def put(self, file_name, result):
+        """
+        Store the result for a file.
+        """
+        stat = os.stat(file_name)
+        self.entries[os.path.abspath(file_name)] = {
+            "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": self.file_sha256(file_name),
+            "ip": sorted(result["ip"]), "url": sorted(result["url"]), "cidr": sorted(result["cidr"]),
+            "invalid": result["invalid"], "lines": result["lines"],
+        }
+        self.dirty = True
+
+    def save(self):
+        """
+        Write the cache through a temporary file and atomic rename.
+        """
+        if not self.dirty:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".targ-sort.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as cache_file:
+                json.dump({"version": CLASSIFIER_VERSION, "files": self.entries}, cache_file)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self.dirty = False
+
+def extract_files(files, jobs=None, chunk_size=CHUNK_SIZE, cache=None):
+    """
+    Extract IP addresses, URLs, and CIDR ranges from many files across a process pool.
+
+    Large files are split into line-aligned chunks. Results are merged in file and
+    chunk order, so deduplication and the invalid-record messages are the same
+    regardless of the number of workers. Files with a valid entry in the cache are
+    not re-read.
+
+    Arguments:
+        files (list): Paths to the input files, in the order they should be reported.
+        jobs (int): Number of worker processes (default: number of CPUs).
+        chunk_size (int): Target chunk size in bytes.
+        cache (ResultCache): Optional cache of per-file results; updated for changed files.
+
+    Returns:
+        tuple: A tuple containing three sets: IP addresses, URLs, and CIDR ranges.
+    """
+    file_results = {}
+    pending = []
+    for file_name in files:
+        cached = cache.get(file_name) if cache is not None else None
+        if cached is None:
+            pending.append(file_name)
         else:
+            file_results[file_name] = cached
+
+    chunks = [chunk for file_name in pending for chunk in split_file(file_name, chunk_size)]
+    with contextlib.ExitStack() as stack:
+        if jobs == 1 or len(chunks) <= 1:
+            chunk_results = map(classify_chunk, chunks)
+        else:
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=jobs))
+            chunk_results = executor.map(classify_chunk, chunks)
+
+        for (file_name, _, _), (ip_addresses, urls, cidr_ranges, invalid, line_count) in zip(chunks, chunk_results):
+            result = file_results.setdefault(
+                file_name, {"ip": set(), "url": set(), "cidr": set(), "invalid": [], "lines": 0})
+            result["invalid"].extend((result["lines"] + index, line) for index, line in invalid)
+            result["lines"] += line_count
+            result["ip"] |= ip_addresses
+            result["url"] |= urls
+            result["cidr"] |= cidr_ranges
+
+    if cache is not None:
+        for file_name in pending:
+            cache.put(file_name, file_results[file_name])
+        cache.save()
+
+    all_ip_addresses = set()
+    all_urls = set()
+    all_cidr_ranges = set()
+    for file_name in files:
+        result = file_results[file_name]
+        for index, line in result["invalid"]:
             print(f"Invalid record found in {file_name} at line {index}: {line}")
+        all_ip_addresses |= result["ip"]
+        all_urls |= result["url"]
+        all_cidr_ranges |= result["cidr"]
+
+    return all_ip_addresses, all_urls, all_cidr_ranges
+
+def ip_sort_key(value):
+    """
+    Sort key ordering IPs and ranges numerically; unparseable values sort last.
+
+    Arguments:
+        value (str): IP address, CIDR block or dash range.
+
+    Returns:
+        tuple: Key usable with sorted().
+    """
+    span = parse_span(value)
+    if span is None:
+        return (1, 0, 0, 0, value)
+    return (0, *span, value)
+
+def merge_spans(spans):
+    """
+    Merge overlapping and adjacent spans of the same IP version.
+
+    Arguments:
+        spans (iterable): (version, start, end) tuples.
+
+    Returns:
+        list: Disjoint (version, start, end) tuples in numeric order.
+    """
+    merged = []
+    for version, start, end in sorted(spans):
+        if merged and merged[-1][0] == version and start <= merged[-1][2] + 1:
+            if end > merged[-1][2]:
+                merged[-1] = (version, merged[-1][1], end)
+        else:
+            merged.append((version, start, end))
+    return merged
+
+def span_to_cidrs(version, start, end):
+    """
+    Express an integer span as the minimal list of CIDR blocks.
+
+    Arguments:
+        version (int): IP version, 4 or 6.
+        start (int): First address of the span.
+        end (int): Last address of the span.
+
+    Returns:
+        list: CIDR strings in numeric order.
+    """
+    bits = 32 if version == 4 else 128
+    cidrs = []
+    while start <= end:
+        # Largest aligned block starting at start that does not run past end
+        size = (start & -start).bit_length() - 1 if start else bits
+        while (1 << size) > end - start + 1:
+            size -= 1
+        if version == 4:
+            address = f"{start >> 24}.{(start >> 16) & 255}.{(start >> 8) & 255}.{start & 255}"
+        else:
+            address = str(ipaddress.IPv6Address(start))
+        cidrs.append(f"{address}/{bits - size}")
+        start += 1 << size
+    return cidrs
+
+def aggregate_targets(ip_addresses, cidr_ranges):
+    """
+    Collapse CIDR blocks and ranges into minimal CIDRs and drop covered IPs.
+
+    Overlapping and adjacent ranges are merged in O(n log n) and IP addresses
+    already covered by a range are removed with a binary search per address.
+    Values that cannot be parsed are kept unchanged at the end of their list.
+
+    Arguments:
+        ip_addresses (iterable): IP address strings.
+        cidr_ranges (iterable): CIDR block and dash range strings.
+
+    Returns:
+        tuple: (IP addresses, CIDR blocks), both lists in numeric order.
+    """
+    spans = []
+    unparsed_ranges = []
+    for value in cidr_ranges:
+        span = parse_span(value)
+        if span is None:
+            unparsed_ranges.append(value)
+        else:
+            spans.append(span)
+    merged = merge_spans(spans)
+    starts = [(version, start) for version, start, _ in merged]
+
+    uncovered = []
+    for value in ip_addresses:
+        span = parse_span(value)
+        if span is not None:
+            version, address, _ = span
+            index = bisect.bisect_right(starts, (version, address)) - 1
+            if index >= 0 and merged[index][0] == version and merged[index][2] >= address:
+                continue
+        uncovered.append(value)
 
-    return file_ip_addresses, file_urls, file_cidr_ranges
+    cidrs = [cidr for span in merged for cidr in span_to_cidrs(*span)]
+    return sorted(uncovered, key=ip_sort_key), cidrs + sorted(unparsed_ranges)
+
+class DomainNode:
+    """
+    A node of DomainTrie, one per domain label.
+    """
+    __slots__ = ("children", "domain", "wildcard")
+
+    def __init__(self):
+        self.children = {}
+        self.domain = None
+        self.wildcard = None
+
+class DomainTrie:
+    """
+    Domain index keyed on reversed, lower-cased labels.
+
+    "a.example.com" is stored under com -> example -> a, so a domain's subdomains
+    live in its subtree. Inserts and coverage lookups cost one step per label,
+    independent of how many domains are stored. Wildcard entries ("*.example.com")
+    are stored as a flag on the node of the domain they cover.
+    """
+
+    def __init__(self):
+        self.root = DomainNode()
+
+    def _node(self, labels):
+        node = self.root
+        for label in reversed(labels):
+            child = node.children.get(label)
+            if child is None:
+                child = node.children[label] = DomainNode()
+            node = child
+        return node
+
+    def insert(self, domain):
+        """
+        Add a domain or wildcard domain to the index.
+
+        Arguments:
+            domain (str): Domain such as "a.example.com" or "*.example.com".
+        """
+        labels = domain.lower().split(".")
+        if labels[0] == "*":
+            node = self._node(labels[1:])
+            node.wildcard = min(node.wildcard or domain, domain)
+        else:
+            node = self._node(labels)
+            node.domain = min(node.domain or domain, domain)
+
+    def covering_entry(self, domain, wildcards_only=False):
+        """
+        Find the nearest stored entry that covers a domain.
+
+        A wildcard covers every subdomain of its parent; with wildcards_only False a
+        stored parent domain also counts as covering its subdomains. The domain
+        itself never counts as covering.
+
+        Arguments:
+            domain (str): Domain to look up.
+            wildcards_only (bool): Only consider wildcard entries.
+
+        Returns:
+            str: The covering entry, or None if the domain is not covered.
+        """
+        labels = domain.lower().split(".")
+        is_wildcard = labels[0] == "*"
+        # The parent of a wildcard is the domain it covers; a plain domain's parent is one label up
+        labels = labels[1:]
+
+        node = self.root
+        cover = None
+        for depth, label in enumerate(reversed(labels), start=1):
+            node = node.children.get(label)
+            if node is None:
+                break
+            # A wildcard does not cover itself
+            own_wildcard = is_wildcard and depth == len(labels)
+            if node.wildcard is not None and not own_wildcard:
+                cover = node.wildcard
+            elif node.domain is not None and not wildcards_only:
+                cover = node.domain
+        return cover
+
+    def grouped(self, collapse_wildcards=False):
+        """
+        List the stored domains grouped under their parents.
+
+        Domains are returned depth first by reversed labels, so every registrable
+        domain is immediately followed by its wildcard and then its subdomains.
+
+        Arguments:
+            collapse_wildcards (bool): Drop entries covered by a wildcard higher up,
+                                       as reported by covering_entry.
+
+        Returns:
+            list: Domain strings.
+        """
+        output = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            for entry in (node.domain, node.wildcard):
+                if entry is None:
+                    continue
+                if collapse_wildcards and self.covering_entry(entry, wildcards_only=True):
+                    continue
+                output.append(entry)
+            for label in sorted(node.children, reverse=True):
+                stack.append(node.children[label])
+        return output
+
+def group_domains(domains, collapse_wildcards=False):
+    """
+    Order domains grouped by parent using a DomainTrie.
+
+    Arguments:
+        domains (iterable): Domain and wildcard domain strings.
+        collapse_wildcards (bool): Drop subdomains covered by an in-scope wildcard.
+
+    Returns:
+        list: Domain strings grouped by registrable parent.
+    """
+    trie = DomainTrie()
+    for domain in domains:
+        trie.insert(domain)
+    return trie.grouped(collapse_wildcards)
 
 def write_to_file(data, filename):
     """
@@ -109,24 +516,33 @@ def write_to_file(data, filename):
 
 
 if __name__ == "__main__":
-    # Get a list of files matching the "targ-*" pattern in the current directory
-    files = [f for f in os.listdir() if os.path.isfile(f) and f.startswith("targ-")]
-
-    all_ip_addresses = []
-    all_urls = []
-    all_cidr_ranges = []
-
-    # Loop through each file and extract IP addresses, URLs, and CIDR ranges
-    for file in files:
-        ip_addresses, urls, cidr_ranges = extract_data(file)
-        all_ip_addresses.extend(ip_addresses)
-        all_urls.extend(urls)
-        all_cidr_ranges.extend(cidr_ranges)
-
-    # Sort the data
-    all_ip_addresses = sorted(set(all_ip_addresses))
-    all_urls = sorted(set(all_urls))
-    all_cidr_ranges = sorted(set(all_cidr_ranges))
+    parser = argparse.ArgumentParser(description="Sort target files into IPs, URLs and CIDR ranges")
+    parser.add_argument("--pattern", "-p", default="targ-*",
+                        help="Glob pattern of input files in the current directory (default: targ-*)")
+    parser.add_argument("--jobs", "-j", type=int, default=None,
+                        help="Number of worker processes (default: number of CPUs)")
+    parser.add_argument("--aggregate", "-a", action="store_true",
+                        help="Merge overlapping ranges into minimal CIDRs and drop IPs they already cover")
+    parser.add_argument("--collapse-wildcards", "-w", action="store_true",
+                        help="Drop subdomains already covered by an in-scope wildcard (*.example.com)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help=f"Reparse every file instead of reusing unchanged results cached in {CACHE_DIR}")
+    args = parser.parse_args()
+
+    # Get a list of files matching the pattern, never re-reading our own output
+    files = sorted(f for f in glob.glob(args.pattern) if os.path.isfile(f) and f not in OUTPUT_FILES)
+
+    # Extract IP addresses, URLs, and CIDR ranges from every file
+    cache = None if args.no_cache else ResultCache()
+    all_ip_addresses, all_urls, all_cidr_ranges = extract_files(files, args.jobs, cache=cache)
+
+    # Sort the data, IPs and ranges numerically
+    if args.aggregate:
+        all_ip_addresses, all_cidr_ranges = aggregate_targets(all_ip_addresses, all_cidr_ranges)
+    else:
+        all_ip_addresses = sorted(all_ip_addresses, key=ip_sort_key)
+        all_cidr_ranges = sorted(all_cidr_ranges, key=ip_sort_key)
+    all_urls = group_domains(all_urls, args.collapse_wildcards)
 
     # Write the sorted data to separate output files
     if all_ip_addresses:
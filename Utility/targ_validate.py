@@ -0,0 +1,301 @@
+#!/usr/bin/env python
+"""
+Script Name: targ_validate.py
+
+Shared validation and classification of target records, used by targ_sort.py and
+targ_verify.py so both apply the same rules.
+
+A record is one of:
+- "ip":   an IPv4 address (dotted quad, 0-255, no leading zeros) or an IPv6 address
+- "cidr": an IPv4 or IPv6 CIDR block, or a dash range ("10.0.0.1-20", "10.0.0.1-1.5",
+          "10.0.0.1-10.0.2.1", "2001:db8::1-2001:db8::ff")
+- "url":  a domain or subdomain with an alphabetic or punycode TLD, optionally a
+          wildcard ("*.example.com"); non-ASCII (IDN) domains are converted to punycode
+
+Patterns are compiled once and classifications of repeated values are cached.
+
+Running this file checks the conformance corpus:
+    python targ_validate.py
+
+Classifier throughput is measured by targ_bench.py.
+"""
+
+import functools
+import ipaddress
+import re
+import sys
+from collections import namedtuple
+
+IP = "ip"
+CIDR = "cidr"
+URL = "url"
+
+LABEL_REGEX = r"(?!-)[A-Za-z0-9-]{1,63}(?<!-)"
+TLD_REGEX = r"(?:[A-Za-z]{2,63}|xn--[A-Za-z0-9-]{1,59})"
+DOMAIN_REGEX = rf"(?:\*\.)?(?:{LABEL_REGEX}\.)+{TLD_REGEX}"
+IPV4_OCTET_REGEX = r"(25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])"
+
+DOMAIN_PATTERN = re.compile(DOMAIN_REGEX)
+IPV4_ADDRESS_PATTERN = re.compile(r"\.".join([IPV4_OCTET_REGEX] * 4))
+PREFIX_PATTERN = re.compile(r"[0-9]{1,3}")
+
+# Bump when the classification rules in this file change; targ_sort.py stores it with
+# its cached results and discards them on a mismatch
+CLASSIFIER_VERSION = 2
+
+# Number of distinct values whose classification is remembered
+CACHE_SIZE = 1 << 16
+
+TargetRecord = namedtuple("TargetRecord", ["line_number", "kind", "value"])
+
+# (value, expected kind) pairs every consumer must agree on
+CONFORMANCE_CORPUS = (
+    ("10.0.0.1", IP),
+    ("0.0.0.0", IP),
+    ("255.255.255.255", IP),
+    ("256.1.1.1", None),
+    ("01.2.3.4", None),
+    ("1.2.3", None),
+    ("1.2.3.4.5", None),
+    ("10.0.0.1abc", None),
+    ("2001:db8::1", IP),
+    ("2001:0db8:0000:0000:0000:0000:0000:0001", IP),
+    ("::1", IP),
+    ("2001:db8:::1", None),
+    ("10.0.0.0/24", CIDR),
+    ("10.0.0.5/24", CIDR),
+    ("10.0.0.0/0", CIDR),
+    ("10.0.0.0/33", None),
+    ("10.0.0.0/", None),
+    ("2001:db8::/32", CIDR),
+    ("2001:db8::/129", None),
+    ("10.0.0.1-20", CIDR),
+    ("10.0.0.1-1.5", CIDR),
+    ("10.0.0.1-10.0.2.1", CIDR),
+    ("10.0.0.20-1", None),
+    ("10.0.0.1-256", None),
+    ("2001:db8::1-2001:db8::ff", CIDR),
+    ("example.com", URL),
+    ("sub.example.co.uk", URL),
+    ("1password.com", URL),
+    ("a-b.example.com", URL),
+    ("-ab.example.com", None),
+    ("ab-.example.com", None),
+    ("*.example.com", URL),
+    ("*.com", None),
+    ("a.*.example.com", None),
+    ("localhost", None),
+    ("example.123", None),
+    ("example..com", None),
+    ("bücher.de", URL),
+    ("xn--bcher-kva.de", URL),
+    ("пример.рф", URL),
+    ("a" * 64 + ".com", None),
+    (".".join(["a" * 50] * 5) + ".com", None),
+    ("not a target", None),
+    ("", None),
+)
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def punycode_domain(domain):
+    """
+    Convert a domain to its punycode representation.
+
+    Arguments:
+        domain (str): Domain to be converted.
+
+    Returns:
+        str: Punycode representation of the domain.
+    """
+    return ".".join([part if part.isascii() else part.encode("idna").decode("ascii")
+                     for part in domain.split(".")])
+
+
+def normalize_line(line):
+    """
+    Trim whitespace and convert non-ASCII domains to punycode.
+
+    Plain ASCII lines skip IDNA encoding entirely. Lines that cannot be IDNA encoded
+    are returned unchanged so they are reported as invalid rather than raising.
+
+    Arguments:
+        line (str): Raw input line.
+
+    Returns:
+        str: Normalized line.
+    """
+    line = line.strip()
+    if line.isascii():
+        return line
+    try:
+        return punycode_domain(line)
+    except UnicodeError:
+        return line
+
+
+def ipv4_to_int(text):
+    """
+    Parse a plain dotted-quad IPv4 address without the overhead of ipaddress.
+
+    Accepts exactly what ipaddress.IPv4Address accepts for dotted quads.
+
+    Arguments:
+        text (str): Candidate IPv4 address.
+
+    Returns:
+        int: The address as an integer, or None if it is not a plain IPv4 address.
+    """
+    match = IPV4_ADDRESS_PATTERN.fullmatch(text)
+    if match is None:
+        return None
+    first, second, third, fourth = map(int, match.groups())
+    return (first << 24) | (second << 16) | (third << 8) | fourth
+
+
+def parse_span(value):
+    """
+    Parse an IP address, CIDR block or dash range into an integer span.
+
+    IPv4 dash ranges replace the trailing octets of the start address, so
+    "10.0.0.1-20" ends at 10.0.0.20 and "10.0.0.1-1.5" ends at 10.0.1.5.
+    IPv6 dash ranges need a full end address.
+
+    Arguments:
+        value (str): IPv4/IPv6 address, CIDR block or dash range.
+
+    Returns:
+        tuple: (version, start, end) with inclusive integer bounds, or None if the
+        value cannot be parsed.
+    """
+    try:
+        if "/" in value:
+            address, prefix = value.split("/", 1)
+            if not PREFIX_PATTERN.fullmatch(prefix):
+                return None
+            number = ipv4_to_int(address)
+            if number is not None:
+                if int(prefix) > 32:
+                    return None
+                host_mask = (1 << (32 - int(prefix))) - 1
+                return 4, number & ~host_mask, number | host_mask
+            network = ipaddress.IPv6Network(value, strict=False)
+            return 6, int(network.network_address), int(network.broadcast_address)
+        if "-" in value:
+            start, end = value.split("-", 1)
+            if ":" in start:
+                start_number, end_number = int(ipaddress.IPv6Address(start)), int(ipaddress.IPv6Address(end))
+                version = 6
+            else:
+                start_octets = start.split(".")
+                end_octets = end.split(".")
+                if not 1 <= len(end_octets) <= 4:
+                    return None
+                start_number = ipv4_to_int(start)
+                end_number = ipv4_to_int(".".join(start_octets[:4 - len(end_octets)] + end_octets))
+                if start_number is None or end_number is None:
+                    return None
+                version = 4
+            if end_number < start_number:
+                return None
+            return version, start_number, end_number
+        number = ipv4_to_int(value)
+        if number is not None:
+            return 4, number, number
+        if ":" in value:
+            number = int(ipaddress.IPv6Address(value))
+            return 6, number, number
+        return None
+    except ValueError:
+        return None
+
+
+def is_valid_domain(domain):
+    """
+    Check if the domain (or wildcard domain) is valid.
+
+    Arguments:
+        domain (str): Domain to be checked, already converted to punycode.
+
+    Returns:
+        bool: True if the domain is valid, False otherwise.
+    """
+    length = len(domain) - 2 if domain.startswith("*.") else len(domain)
+    return length <= 253 and DOMAIN_PATTERN.fullmatch(domain) is not None
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def classify_value(value):
+    """
+    Classify a normalized value.
+
+    Arguments:
+        value (str): Value as returned by normalize_line.
+
+    Returns:
+        str: IP, CIDR or URL, or None if the value is not a valid target.
+    """
+    if value[:1].isdigit() or ":" in value:
+        span = parse_span(value)
+        if span is not None:
+            return CIDR if "/" in value or "-" in value else IP
+    if is_valid_domain(value):
+        return URL
+    return None
+
+
+def is_valid_line(line):
+    """
+    Check if a line is a valid domain, subdomain, IP address, IP range, or CIDR block.
+
+    Arguments:
+        line (str): Line to check; surrounding whitespace is ignored.
+
+    Returns:
+        bool: True if the line is valid, False otherwise.
+    """
+    return classify_value(normalize_line(line)) is not None
+
+
+def classify_lines(lines):
+    """
+    Classify an iterable of lines.
+
+    Arguments:
+        lines (iterable): Raw input lines.
+
+    Yields:
+        TargetRecord: (line number, kind, normalized value) where kind is IP, CIDR,
+        URL or None for invalid records.
+    """
+    classify = classify_value
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line.isascii():
+            line = normalize_line(line)
+        yield TargetRecord(line_number, classify(line), line)
+
+
+def check_conformance():
+    """
+    Check classify_value against the conformance corpus.
+
+    Returns:
+        list: (value, expected, actual) for every case that does not match.
+    """
+    failures = []
+    for value, expected in CONFORMANCE_CORPUS:
+        actual = classify_value(normalize_line(value))
+        if actual != expected:
+            failures.append((value, expected, actual))
+    return failures
+
+
+if __name__ == "__main__":
+    failed = check_conformance()
+    for case, expected_kind, actual_kind in failed:
+        print(f"FAIL {case!r}: expected {expected_kind}, got {actual_kind}")
+    print(f"Conformance: {len(CONFORMANCE_CORPUS) - len(failed)}/{len(CONFORMANCE_CORPUS)} cases pass")
+
+    if failed:
+        sys.exit(1)
@@ -10,80 +10,212 @@
 removes leading/trailing whitespace, and validates each line to ensure it is a valid domain, 
 subdomain, IP address, IP range, or CIDR block.
 - If an invalid line is found, a warning message will be output to the console with the 
-  file name and line number.
+  file name and line number. Invalid lines are kept, or removed with --drop-invalid.
 - If the line was modified (i.e. leading/trailing whitespace removed), it replaces the original line 
-  with the modified line in the file.
+  with the modified line in the file. Files are only rewritten when their content changes, through
+  a temporary file and atomic rename.
+- With --check nothing is written; files that would change are reported and the exit status is 1.
+- Files are verified in parallel (--jobs) and a summary is printed as a table or, with
+  --format json, as machine-readable JSON for CI.
 - If no invalid lines are found, a message saying "All clear" will be output to the console.
 
+Validation rules are shared with targ_sort.py through targ_validate.py, which must sit next to
+this script.
+
 Requirements:
-- Python 3.6 or later
+- Python 3.7 or later
 """
 
+import argparse
+import json
 import os
-import re
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from targ_validate import is_valid_line
 
 
-def is_valid_line(line):
+def scan_file(file_path, drop_invalid=False):
     """
-    Checks if a line is a valid domain, subdomain, IP address, IP range, or CIDR block.
+    Streams a file and reports what verification would change, without writing.
 
     Args:
-    - line: A string containing the line to check.
+    - file_path: Path of the file to scan.
+    - drop_invalid: Whether invalid lines would be removed from the file.
 
     Returns:
-    - True if the line is valid, False otherwise.
+    - A tuple (changed, invalid, line_count) where changed is True if the normalized content
+      differs from the file, invalid is a list of (line number, line) tuples and line_count
+      is the number of lines read.
+    """
+    changed = False
+    invalid = []
+    line_count = 0
+    with open(file_path, "r", encoding='utf-8', newline='') as targ_file:
+        for line_count, raw_line in enumerate(targ_file, start=1):
+            line = raw_line.strip()
+            if line != "" and not is_valid_line(line):
+                invalid.append((line_count, line))
+                if drop_invalid:
+                    changed = True
+                    continue
+            if raw_line != line + "\n":
+                changed = True
+    return changed, invalid, line_count
+
+
+def rewrite_file(file_path, drop_invalid=False):
     """
-    # Define regular expression patterns for each type of valid line
-    domain_pattern = r"^(?:[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)+[a-zA-Z]{2,}$"
-    ip_address_pattern = r"^(?:(?:\d{1,3}\.){3}\d{1,3})(?:/(?:[1-9]|[1-2]\d|3[0-2]))?$"
+    Writes the normalized content of a file through a temporary file and atomic rename,
+    so an interrupted run never leaves a partially written file.
 
-    # Check if the line matches any of the patterns
-    return bool(re.match(domain_pattern, line)) or bool(re.match(ip_address_pattern, line))
+    Args:
+    - file_path: Path of the file to rewrite.
+    - drop_invalid: Whether invalid lines are removed from the file.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".targ-verify.", suffix=".tmp", dir=directory)
+    try:
+        with open(file_path, "r", encoding='utf-8', newline='') as targ_file, \
+                os.fdopen(fd, "w", encoding='utf-8', newline='') as tmp_file:
+            for raw_line in targ_file:
+                line = raw_line.strip()
+                if drop_invalid and line != "" and not is_valid_line(line):
+                    continue
+                tmp_file.write(line + "\n")
+        shutil.copymode(file_path, tmp_path)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def verify_file(file_path, check=False, drop_invalid=False):
+    """
+    Verifies a single file and normalizes it unless check is set. Runs in a worker process.
 
+    Args:
+    - file_path: Path of the file to verify.
+    - check: Report only, never write.
+    - drop_invalid: Whether invalid lines are removed from the file.
 
-def verify_files():
+    Returns:
+    - A dict with the file's status ("clean", "normalized", "would rewrite", "invalid" or
+      "skipped"), line and byte counts, invalid lines and whether it was or would be rewritten.
+    """
+    result = {"file": file_path, "status": "clean", "lines": 0, "bytes": os.path.getsize(file_path),
+              "invalid": [], "changed": False, "rewritten": False}
+    try:
+        changed, invalid, result["lines"] = scan_file(file_path, drop_invalid)
+    except UnicodeDecodeError:
+        result["status"] = "skipped"
+        return result
+
+    result["invalid"] = [{"line": i, "text": line} for i, line in invalid]
+    result["changed"] = changed
+    if changed:
+        if check:
+            result["status"] = "would rewrite"
+        else:
+            rewrite_file(file_path, drop_invalid)
+            result["rewritten"] = True
+            result["status"] = "normalized"
+    if invalid:
+        result["status"] = "invalid"
+    return result
+
+
+def verify_files(check=False, drop_invalid=False, jobs=None):
     """
     Loops through all the files in the current directory (except for itself), removes 
     leading/trailing whitespace, and validates each line to ensure it is a valid domain, 
-    subdomain, IP address, IP range, or CIDR block.
-    - If an invalid line is found, a warning message will be output to the console with the file
-      name and line number.
-    - If the line was modified (i.e. leading/trailing whitespace removed), it replaces the original
-      line with the modified line in the file.
-    - If no invalid lines are found, a message saying "All clear" will be output to the console.
+    subdomain, IP address, IP range, or CIDR block. Files are verified in parallel across
+    a process pool; results are returned in file name order.
+    - Invalid lines are kept unless drop_invalid is set.
+    - Files are only rewritten (atomically) if their normalized content differs.
+    - With check set, nothing is written; files that would change are reported instead.
+
+    Returns:
+    - A report dict with the per-file results, totals and an overall all_clear flag, which
+      is True if every file is clean (and, in check mode, already normalized).
     """
     current_dir = os.getcwd()
-    print(f"Current Directory: {current_dir}")
-
-    invalid_found = False
-
-    for file in os.listdir(current_dir):
-        if file.endswith(".py"):
-            continue
-
-        file_path = os.path.join(current_dir, file)
-        with open(file_path, "r+", encoding='utf-8') as targ_file:
-            lines = targ_file.readlines()
-            targ_file.seek(0)
-            targ_file.truncate(0)
-
-            for i, line in enumerate(lines, start=1):
-                line = line.strip()
-                if line != "" and not is_valid_line(line):
-                    print(f"{file_path} ({i}): Invalid line: {line}")
-                    invalid_found = True
-                else:
-                    targ_file.write(line + "\n")
-
-            if invalid_found:
-                print(
-                    f"{file_path} has invalid lines, please fix them before proceeding.")
-            else:
-                print(f"{file_path} is clean.")
-
-    if not invalid_found:
+    files = [os.path.join(current_dir, file) for file in sorted(os.listdir(current_dir))
+             if not file.endswith(".py") and os.path.isfile(os.path.join(current_dir, file))]
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = list(executor.map(verify_file, files, [check] * len(files), [drop_invalid] * len(files)))
+
+    totals = {"files": len(results), "lines": 0, "bytes": 0, "invalid_lines": 0, "invalid_files": 0,
+              "changed_files": 0, "skipped_files": 0}
+    for result in results:
+        totals["lines"] += result["lines"]
+        totals["bytes"] += result["bytes"]
+        totals["invalid_lines"] += len(result["invalid"])
+        totals["invalid_files"] += bool(result["invalid"])
+        totals["changed_files"] += result["changed"]
+        totals["skipped_files"] += result["status"] == "skipped"
+
+    all_clear = totals["invalid_files"] == 0 and not (check and totals["changed_files"])
+    return {"directory": current_dir, "check": check, "drop_invalid": drop_invalid,
+            "files": results, "totals": totals, "all_clear": all_clear}
+
+
+def print_report(report):
+    """
+    Prints a verification report as a table, preceded by one warning per invalid line.
+
+    Args:
+    - report: Report dict as returned by verify_files.
+    """
+    print(f"Current Directory: {report['directory']}")
+    action = "dropped" if report["drop_invalid"] else "kept"
+    for result in report["files"]:
+        for invalid in result["invalid"]:
+            print(f"{result['file']} ({invalid['line']}): Invalid line ({action}): {invalid['text']}")
+
+    rows = [(os.path.basename(result["file"]), result["lines"], result["bytes"], len(result["invalid"]),
+             result["status"], ",".join(str(invalid["line"]) for invalid in result["invalid"][:10])
+             + (",..." if len(result["invalid"]) > 10 else ""))
+            for result in report["files"]]
+    width = max([len("File")] + [len(row[0]) for row in rows])
+    print(f"\n{'File':<{width}}  {'Lines':>9}  {'Bytes':>12}  {'Invalid':>7}  {'Status':<13}  Invalid lines")
+    for name, lines, size, invalid, status, line_numbers in rows:
+        print(f"{name:<{width}}  {lines:>9}  {size:>12}  {invalid:>7}  {status:<13}  {line_numbers}")
+
+    totals = report["totals"]
+    print(f"\n{totals['files']} files, {totals['lines']} lines, {totals['bytes']} bytes, "
+          f"{totals['invalid_lines']} invalid lines in {totals['invalid_files']} files, "
+          f"{totals['changed_files']} files {'to rewrite' if report['check'] else 'rewritten'}.")
+    if report["all_clear"]:
         print("All clear")
+    else:
+        print("Please fix the files above before proceeding.")
 
 
 if __name__ == "__main__":
-    verify_files()
+    parser = argparse.ArgumentParser(description="Normalize and validate target files in the current directory")
+    parser.add_argument("--check", action="store_true",
+                        help="Report problems without modifying any file (exit status 1 if any)")
+    policy = parser.add_mutually_exclusive_group()
+    policy.add_argument("--drop-invalid", dest="drop_invalid", action="store_true",
+                        help="Remove invalid lines from the files")
+    policy.add_argument("--keep-invalid", dest="drop_invalid", action="store_false",
+                        help="Leave invalid lines in place (default)")
+    parser.add_argument("--jobs", "-j", type=int, default=None,
+                        help="Number of worker processes (default: number of CPUs)")
+    parser.add_argument("--format", "-f", choices=["table", "json"], default="table",
+                        help="Report format (default: table)")
+    args = parser.parse_args()
+
+    verification = verify_files(args.check, args.drop_invalid, args.jobs)
+    if args.format == "json":
+        json.dump(verification, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(verification)
+
+    if not verification["all_clear"]:
+        sys.exit(1)